@@ -1,17 +1,27 @@
-from typing import Annotated
+import hmac
+from typing import Annotated, AsyncIterator
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi import Depends, HTTPException, status
-from app.core.security import oauth2_scheme
+from fastapi import Depends, HTTPException, Request, status
+from sqlmodel import select
+from app.api.schemas.user import Principal
+from app.core.principals import principal_cache
+from app.core.rate_limit import rate_limiter, rate_limits, retry_after_header
+from app.core.revocations import revoked_tokens
+from app.core.security import (
+    internal_token_header,
+    oauth2_scheme,
+    optional_oauth2_scheme,
+)
+from app.database.config import SecuritySettings as settings
 from app.database.models import User
-from app.database.redis import is_jti_blacklisted
+from app.database.replica import replica_router, wrote
 from app.database.session import get_session
-from app.services.blocks import BlockService
+from app.services.blocks import BlockService, FeedFilters
 from app.services.publications import PublicationService
 from app.services.user import UserService
 from app.utils import decode_access_token
 
-
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
 
 
@@ -27,9 +37,18 @@ def create_publication_service(session: SessionDep):
     return PublicationService(session)
 
 
-async def return_the_access_token(token: Annotated[str, Depends(oauth2_scheme)]):
+async def _verified_token_data(token: str) -> dict | None:
     data = decode_access_token(token)
-    if data is None or await is_jti_blacklisted(data["jti"]):
+    if data is None or await revoked_tokens.is_revoked(
+        data["jti"], data["user"]["id"], data.get("iat", 0)
+    ):
+        return None
+    return data
+
+
+async def return_the_access_token(token: Annotated[str, Depends(oauth2_scheme)]):
+    data = await _verified_token_data(token)
+    if data is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired access token.",
@@ -37,15 +56,126 @@ async def return_the_access_token(token: Annotated[str, Depends(oauth2_scheme)])
     return data
 
 
+async def return_the_optional_access_token(
+    token: Annotated[str | None, Depends(optional_oauth2_scheme)],
+):
+    """The caller's token data, or None for anonymous callers.
+
+    An expired, invalid or revoked token also counts as anonymous, so public
+    routes keep serving clients that still send an old token.
+    """
+    if token is None:
+        return None
+    return await _verified_token_data(token)
+
+
+async def get_read_session(
+    data: Annotated[dict | None, Depends(return_the_optional_access_token)],
+):
+    """Session for read-only routes, on the replica when it is safe to."""
+    user_id = UUID(data["user"]["id"]) if data is not None else None
+    async with replica_router.session(user_id) as session:
+        yield session
+
+
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session)]
+
+
+def create_read_publication_service(session: ReadSessionDep):
+    return PublicationService(session)
+
+
+async def require_internal_token(
+    token: Annotated[str | None, Depends(internal_token_header)],
+):
+    """Let through only operators holding INTERNAL_API_TOKEN."""
+    expected = settings().INTERNAL_API_TOKEN
+    if not expected:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    if token is None or not hmac.compare_digest(token.encode(), expected.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid or missing internal token.",
+        )
+
+
+def client_address(request: Request) -> str:
+    """The client's IP, taken from X-Forwarded-For behind a trusted proxy."""
+    return request.client.host if request.client else "unknown"
+
+
+async def get_caller(
+    request: Request,
+    data: Annotated[dict | None, Depends(return_the_optional_access_token)],
+) -> str:
+    """Who is calling: the user when authenticated, the client IP otherwise."""
+    if data is not None:
+        return f"user:{data['user']['id']}"
+    return f"ip:{client_address(request)}"
+
+
+CallerDep = Annotated[str, Depends(get_caller)]
+
+
+def rate_limit(name: str):
+    """Dependency spending a token from the caller's bucket for `name`.
+
+    Authenticated callers are limited per user, anonymous ones per client IP.
+    A stale or invalid token never rejects the request here: the caller is
+    just counted by IP, so login keeps working for clients that resend it.
+    """
+    limit = rate_limits[name]
+
+    async def check_rate_limit(caller: CallerDep):
+        retry_after = await rate_limiter.hit(f"{name}:{caller}", limit)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, slow down.",
+                headers=retry_after_header(retry_after),
+            )
+
+    return Depends(check_rate_limit)
+
+
+async def get_feed_filters(
+    data: Annotated[dict | None, Depends(return_the_optional_access_token)],
+    service: Annotated[BlockService, Depends(create_block_service)],
+) -> FeedFilters:
+    if data is None:
+        return FeedFilters()
+    return await service.get_feed_filters(UUID(data["user"]["id"]))
+
+
 async def get_current_user(
     data: Annotated[dict, Depends(return_the_access_token)], session: SessionDep
-):
-    return await session.get(User, UUID(data["user"]["id"]))
+) -> AsyncIterator[Principal | None]:
+    user_id = UUID(data["user"]["id"])
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        result = await session.execute(
+            select(User.id, User.name, User.nickname, User.created_at).where(
+                User.id == user_id
+            )
+        )
+        row = result.first()
+        if row is not None:
+            principal = Principal(**row._mapping)
+            principal_cache.set(principal)
+    yield principal
+    # Runs before the response is sent, so the user's next read already
+    # knows to go to the primary.
+    if wrote(session):
+        await replica_router.record_write(user_id)
 
 
 PublicationServiceDep = Annotated[
     PublicationService, Depends(create_publication_service)
 ]
+ReadPublicationServiceDep = Annotated[
+    PublicationService, Depends(create_read_publication_service)
+]
 UserServiceDep = Annotated[UserService, Depends(create_user_service)]
-UserDep = Annotated[User, Depends(get_current_user)]
+UserDep = Annotated[Principal, Depends(get_current_user)]
 BlockServiceDep = Annotated[BlockService, Depends(create_block_service)]
+FeedFiltersDep = Annotated[FeedFilters, Depends(get_feed_filters)]
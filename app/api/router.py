@@ -1,8 +1,9 @@
 from fastapi import APIRouter
-from .routers import user, publications, blocks
+from .routers import user, publications, blocks, internal
 
 master_router = APIRouter()
 
 master_router.include_router(user.router)
 master_router.include_router(publications.router)
 master_router.include_router(blocks.router)
+master_router.include_router(internal.router)
@@ -10,6 +10,8 @@ async def block_tags(current_user: UserDep, tag: Tags, service: BlockServiceDep)
     return await service.block_tag(tag, current_user)
 
 
-@router.post("/users")
-async def block_users_by_nickname():
-    pass
+@router.post("/users", response_model=None)
+async def block_users_by_nickname(
+    current_user: UserDep, nickname: str, service: BlockServiceDep
+):
+    return await service.block_user(nickname, current_user)
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends
+
+from app.api.dependencies import require_internal_token
+
+from app.core.load_shedding import load_monitor
+from app.core.revocations import revoked_tokens
+from app.database.replica import replica_router
+from app.database.session import engine, replica_engine
+from app.services.feed_cache import feed_cache_stats
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["Internal"],
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_token)],
+)
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    hits, misses = feed_cache_stats["hits"], feed_cache_stats["misses"]
+    return {
+        "feed": {
+            "hits": hits,
+            "misses": misses,
+            "errors": feed_cache_stats["errors"],
+            "bypasses": feed_cache_stats["bypasses"],
+            "hit_ratio": hits / (hits + misses) if hits + misses else None,
+        }
+    }
+
+
+@router.get("/pool")
+async def get_pool_stats():
+    return engine.pool.metrics()
+
+
+@router.get("/replica")
+async def get_replica_stats():
+    stats = replica_router.metrics()
+    if replica_engine is not None:
+        stats["pool"] = replica_engine.pool.metrics()
+    return stats
+
+
+@router.get("/load")
+async def get_load_stats():
+    return {
+        "event_loop_lag_seconds": load_monitor.lag,
+        "in_flight": load_monitor.in_flight,
+        "shed": load_monitor.shed,
+    }
+
+
+@router.get("/revocations")
+async def get_revocation_stats():
+    return await revoked_tokens.memory_usage()
@@ -1,107 +1,302 @@
 from datetime import datetime
-from typing import Annotated, List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Annotated
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.params import Query
-import humanize
-
-from app.api.dependencies import PublicationServiceDep, SessionDep, UserDep
+from fastapi.responses import StreamingResponse
+
+from app.api.conditional import (
+    Validators,
+    entity_tag,
+    is_conditional,
+    is_not_modified,
+    not_modified,
+)
+from app.api.dependencies import (
+    CallerDep,
+    FeedFiltersDep,
+    PublicationServiceDep,
+    ReadPublicationServiceDep,
+    ReadSessionDep,
+    SessionDep,
+    UserDep,
+    rate_limit,
+)
 from app.api.schemas.publication import (
     BasePublication,
     CreatePublication,
     DateSearch,
+    ImportReport,
+    PublicationPage,
     ReadPublication,
     UpdatePublication,
 )
-from app.database.models import Publication, Tags, User
+from app.database.models import Tags
+from app.database.replica import replica_router
 from app.database.session import get_session
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.services.conversion import (
+    convert_publication_to_readable_publication,
+    render_publication_page,
+)
+from app.services.feed_cache import (
+    LATEST_FEED,
+    cache_page,
+    get_cached_page,
+    get_feeds_last_modified,
+    tag_feed,
+)
+from app.services.exports import (
+    EXPORT_MEDIA_TYPES,
+    ExportFormat,
+    export_publications,
+)
+from app.services.imports import import_publications
 from app.services.publications import PublicationService
 
-
 router = APIRouter(prefix="/publications", tags=["Publications"])
 
+CursorQuery = Annotated[
+    str | None,
+    Query(description="Opaque cursor returned as next_cursor by the previous page"),
+]
+LimitQuery = Annotated[int, Query(ge=1, le=100)]
+
+
+def page_response(
+    request: Request, page: bytes, last_modified: datetime | None
+) -> Response:
+    """Serve a cached feed page with validators.
+
+    The ETag hashes the page bytes, so it is exact and, on a feed cache hit,
+    is answered without touching Postgres. Last-Modified is the collection
+    stamp of the last publication write, which does not move when only
+    counters or relative times change; clients that send If-None-Match get
+    exact revalidation regardless.
+    """
+    validators = Validators(etag=entity_tag(page), last_modified=last_modified)
+    if is_not_modified(request, validators):
+        return not_modified(validators)
+    return Response(
+        content=page, media_type="application/json", headers=validators.headers
+    )
+
+
+@router.get("/latest", response_model=PublicationPage)
+async def get_latest_publications(
+    request: Request,
+    service: ReadPublicationServiceDep,
+    session: ReadSessionDep,
+    filters: FeedFiltersDep,
+    cursor: CursorQuery = None,
+    limit: LimitQuery = 20,
+):
+    last_modified = await get_feeds_last_modified()
+    cached_page = await get_cached_page(LATEST_FEED, cursor, limit, filters)
+    if cached_page is not None:
+        return page_response(request, cached_page.encode(), last_modified)
 
-@router.get("/latest", response_model=List[ReadPublication])
-async def get_latest_publications(service: PublicationServiceDep, session: SessionDep):
-    result = await service.get_latest_publications()
-    return await convert_publication_to_readable_publication(result, session)
+    result, next_cursor = await service.get_latest_publications(cursor, limit, filters)
+    page = await render_publication_page(result, session, next_cursor)
+    if replica_router.may_cache(session, last_modified):
+        await cache_page(LATEST_FEED, cursor, limit, page, result, filters)
+    return page_response(request, page, last_modified)
 
 
-@router.get("/me", response_model=List[ReadPublication])
+@router.get("/me", response_model=PublicationPage)
 async def get_current_user_publications(
-    service: PublicationServiceDep, current_user: UserDep, session: SessionDep
+    service: ReadPublicationServiceDep,
+    current_user: UserDep,
+    session: ReadSessionDep,
+    cursor: CursorQuery = None,
+    limit: LimitQuery = 20,
 ):
-    publications_by_current_user = await service.get_my_publications(current_user)
-    if not publications_by_current_user:
+    publications_by_current_user, next_cursor = await service.get_my_publications(
+        current_user, cursor, limit
+    )
+    if not publications_by_current_user and not cursor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="You don't have any posts yet. Why not try?",
         )
-    return await convert_publication_to_readable_publication(
-        publications_by_current_user, session
+    return Response(
+        content=await render_publication_page(
+            publications_by_current_user, session, next_cursor
+        ),
+        media_type="application/json",
+    )
+
+
+@router.get("/me/export")
+async def export_current_user_publications(
+    current_user: UserDep, format: ExportFormat = ExportFormat.ndjson
+):
+    return StreamingResponse(
+        export_publications(current_user.id, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="publications.{format.value}"'
+        },
     )
 
 
 @router.get("/id", response_model=ReadPublication)
 async def get_publications_by_id(
-    id: int, service: PublicationServiceDep, session: SessionDep
+    id: int,
+    request: Request,
+    response: Response,
+    service: ReadPublicationServiceDep,
+    filters: FeedFiltersDep,
+    viewer: CallerDep,
 ):
-    return await service.get_by_id(id)
+    # Only revalidations can end in a 304; a plain read goes straight to
+    # get_by_id, which records the view and returns validators that include it.
+    if is_conditional(request):
+        validators = await service.get_validators(id, filters)
+        if validators and is_not_modified(request, validators):
+            return not_modified(validators)
 
+    publication, validators = await service.get_by_id(id, viewer, filters)
+    response.headers.update(validators.headers)
+    return publication
 
-@router.get("/tag")
+
+@router.get("/tag", response_model=PublicationPage)
 async def get_publications_by_tag(
-    tag: Tags, service: PublicationServiceDep, session: SessionDep
+    tag: Tags,
+    request: Request,
+    service: ReadPublicationServiceDep,
+    session: ReadSessionDep,
+    filters: FeedFiltersDep,
+    cursor: CursorQuery = None,
+    limit: LimitQuery = 20,
 ):
-    return await convert_publication_to_readable_publication(
-        await service.get_by_tag(tag), session
-    )
+    last_modified = await get_feeds_last_modified()
+    cached_page = await get_cached_page(tag_feed(tag), cursor, limit, filters)
+    if cached_page is not None:
+        return page_response(request, cached_page.encode(), last_modified)
 
+    publications, next_cursor = await service.get_by_tag(tag, cursor, limit, filters)
+    page = await render_publication_page(publications, session, next_cursor)
+    if replica_router.may_cache(session, last_modified):
+        await cache_page(tag_feed(tag), cursor, limit, page, publications, filters)
+    return page_response(request, page, last_modified)
 
-@router.get("/days")
+
+@router.get("/days", response_model=PublicationPage)
 async def get_publications_by_days_of_posted(
-    service: PublicationServiceDep,
+    service: ReadPublicationServiceDep,
     days: int,
-    session: SessionDep,
+    session: ReadSessionDep,
+    filters: FeedFiltersDep,
     date_of_post: DateSearch = Query(
         ...,
         description='Use "last" to post in the last x days and "up" to posts up to x days ago',
     ),
+    cursor: CursorQuery = None,
+    limit: LimitQuery = 20,
 ):
-    publications_by_date = await service.get_by_days(days, date_of_post)
-    return await convert_publication_to_readable_publication(
-        publications_by_date, session
+    publications_by_date, next_cursor = await service.get_by_days(
+        days, date_of_post, cursor, limit, filters
+    )
+    return Response(
+        content=await render_publication_page(
+            publications_by_date, session, next_cursor
+        ),
+        media_type="application/json",
     )
 
 
-@router.get("/like-post")
+@router.get("/trending", response_model=PublicationPage)
+async def get_trending_publications(
+    service: ReadPublicationServiceDep,
+    session: ReadSessionDep,
+    filters: FeedFiltersDep,
+    tag: Tags | None = None,
+    cursor: CursorQuery = None,
+    limit: LimitQuery = 20,
+):
+    publications, next_cursor = await service.get_trending(tag, cursor, limit, filters)
+    return Response(
+        content=await render_publication_page(publications, session, next_cursor),
+        media_type="application/json",
+    )
+
+
+@router.get(
+    "/search", response_model=PublicationPage, dependencies=[rate_limit("search")]
+)
+async def search_publications(
+    service: ReadPublicationServiceDep,
+    session: ReadSessionDep,
+    filters: FeedFiltersDep,
+    q: str = Query(..., min_length=1, max_length=200),
+    tag: Tags | None = None,
+    days: int | None = None,
+    date_of_post: DateSearch | None = Query(
+        None,
+        description='Combine with "days": "last" for posts in the last x days and "up" for posts up to x days ago',
+    ),
+    cursor: CursorQuery = None,
+    limit: LimitQuery = 20,
+):
+    publications, next_cursor = await service.search(
+        q, tag, days, date_of_post, cursor, limit, filters
+    )
+    return Response(
+        content=await render_publication_page(publications, session, next_cursor),
+        media_type="application/json",
+    )
+
+
+@router.get("/like-post", dependencies=[rate_limit("reaction")])
 async def like_publication_by_id(
     id: int, service: PublicationServiceDep, current_user: UserDep
 ):
     return await service.like(id, current_user)
 
 
-@router.get("/liked-posts")
+@router.get("/liked-posts", response_model=PublicationPage)
 async def get_liked_posts(
-    current_user: UserDep, service: PublicationServiceDep, session: SessionDep
+    current_user: UserDep,
+    service: ReadPublicationServiceDep,
+    session: ReadSessionDep,
+    filters: FeedFiltersDep,
+    cursor: CursorQuery = None,
+    limit: LimitQuery = 20,
 ):
-    liked_posts = await service.get_liked_publications(current_user)
-    return await convert_publication_to_readable_publication(liked_posts, session)
+    liked_posts, next_cursor = await service.get_liked_publications(
+        current_user, cursor, limit, filters
+    )
+    return Response(
+        content=await render_publication_page(liked_posts, session, next_cursor),
+        media_type="application/json",
+    )
 
 
-@router.get("/dislike-post")
+@router.get("/dislike-post", dependencies=[rate_limit("reaction")])
 async def dislike_publication_by_id(
     id: int, current_user: UserDep, service: PublicationServiceDep
 ):
     return await service.dislike(id, current_user)
 
 
-@router.get("/disliked-posts")
-async def get_disliked_posts(service: PublicationServiceDep, current_user: UserDep, session: SessionDep):
-    disliked_posts = service.get_disliked_posts(current_user)
-    return await convert_publication_to_readable_publication(disliked_posts, session)
-
+@router.get("/disliked-posts", response_model=PublicationPage)
+async def get_disliked_posts(
+    service: ReadPublicationServiceDep,
+    current_user: UserDep,
+    session: ReadSessionDep,
+    filters: FeedFiltersDep,
+    cursor: CursorQuery = None,
+    limit: LimitQuery = 20,
+):
+    disliked_posts, next_cursor = await service.get_disliked_publications(
+        current_user, cursor, limit, filters
+    )
+    return Response(
+        content=await render_publication_page(disliked_posts, session, next_cursor),
+        media_type="application/json",
+    )
 
 
 @router.post("/")
@@ -115,6 +310,28 @@ async def create_publication(
     return await PublicationService(session).add(publication, user)
 
 
+@router.post(
+    "/import",
+    response_model=ImportReport,
+    dependencies=[rate_limit("import")],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {
+                    "schema": {"type": "string"},
+                    "example": '{"title": "...", "description": "...", "tag": "Games"}',
+                }
+            },
+        }
+    },
+)
+async def import_publications_from_ndjson(
+    request: Request, user: UserDep, session: SessionDep
+):
+    return await import_publications(session, request.stream(), user)
+
+
 @router.patch("/")
 async def update_publication(
     current_user: UserDep,
@@ -124,13 +341,7 @@ async def update_publication(
     session: SessionDep,
 ):
     publication = await service.update(id, current_user, update_publication)
-    creator = await session.get(entity=User, ident=publication.creator_id)
-    return ReadPublication(
-        **publication.model_dump(exclude=["published_at", "creator", "last_update_at"]),
-        creator_name=creator.nickname,
-        published_at=humanize.naturaltime(datetime.now() - publication.published_at),
-        last_update_at=humanize.naturaltime(publication.last_update_at)
-    )
+    return await convert_publication_to_readable_publication(publication, session)
 
 
 @router.delete("/")
@@ -138,25 +349,3 @@ async def delete_publication(
     id: int, current_user: UserDep, service: PublicationServiceDep
 ):
     return await service.delete(id, current_user)
-
-
-async def convert_publication_to_readable_publication(
-    publications: List[Publication], session: SessionDep
-) -> List[ReadPublication]:
-    result = []
-    for publication in publications:
-        creator = await session.get(entity=User, ident=publication.creator_id)
-        result.append(
-            ReadPublication(
-                **publication.model_dump(
-                    exclude=["published_at", "creator", "last_update_at"]
-                ),
-                creator_name=creator.nickname,
-                published_at=humanize.naturaltime(
-                    datetime.now() - publication.published_at
-                ),
-                last_update_at=humanize.naturaltime(publication.last_update_at)
-            )
-        )
-
-    return result
@@ -1,7 +1,12 @@
 from typing import Annotated
 
-from app.database.redis import add_jti_to_blacklist
-from ..dependencies import UserDep, UserServiceDep, return_the_access_token
+from app.core.revocations import revoked_tokens
+from ..dependencies import (
+    UserDep,
+    UserServiceDep,
+    rate_limit,
+    return_the_access_token,
+)
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status
 from app.database.models import User
@@ -21,7 +26,7 @@ async def get_user(current_user: UserDep):
     )
 
 
-@router.post("/signup")
+@router.post("/signup", dependencies=[rate_limit("auth")])
 async def create_user(user: CreateUser, service: UserServiceDep) -> User:
     return await service.add(user)
 
@@ -44,7 +49,7 @@ async def delete_user(user: DeleteUser, service: UserServiceDep, current_user: U
     return await service.delete(user, current_user)
 
 
-@router.post("/login")
+@router.post("/login", dependencies=[rate_limit("auth")])
 async def login_user(
     request_form: Annotated[OAuth2PasswordRequestForm, Depends()],
     service: UserServiceDep,
@@ -56,5 +61,13 @@ async def login_user(
 
 @router.get("/logout")
 async def logout_user(token_data: Annotated[dict, Depends(return_the_access_token)]):
-    await add_jti_to_blacklist(token_data["jti"])
+    await revoked_tokens.revoke(token_data["jti"], token_data["exp"])
     return {"detail": "Successfully Logged Out."}
+
+
+@router.get("/logout-all")
+async def logout_user_everywhere(
+    token_data: Annotated[dict, Depends(return_the_access_token)],
+):
+    await revoked_tokens.revoke_user(token_data["user"]["id"])
+    return {"detail": "Successfully Logged Out from every session."}
@@ -1,8 +1,17 @@
 from enum import Enum
+from typing import List
 from pydantic import BaseModel, Field, field_serializer
 from app.database.models import Tags
 
 
+def preview_description(description: str) -> str:
+    return (
+        description[:50] + "...Access the post to read more."
+        if len(description) > 50
+        else description
+    )
+
+
 class BasePublication(BaseModel):
     title: str
     description: str
@@ -21,14 +30,32 @@ class ReadPublication(BasePublication):
     dislikes: int
     published_at: str
     last_update_at: str
+    unique_viewers: int | None = None
 
     @field_serializer("description")
     def serialize_description(self, value, _info):
-        return (
-            value[:50] + "...Access the post to read more."
-            if len(value) > 50
-            else value
-        )
+        return preview_description(value)
+
+
+class PublicationPage(BaseModel):
+    items: List[ReadPublication]
+    next_cursor: str | None = None
+
+
+class ImportPublication(CreatePublication):
+    title: str = Field(max_length=100)
+    description: str = Field(max_length=2000)
+
+
+class ImportRowError(BaseModel):
+    line: int
+    detail: str
+
+
+class ImportReport(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
 
 
 class UpdatePublication(BaseModel):
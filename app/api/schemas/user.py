@@ -30,6 +30,13 @@ class DeleteUser(BaseUser):
     password: str
 
 
+class Principal(BaseUser):
+    """The authenticated user, as much of it as request handlers need."""
+
+    id: UUID
+    created_at: datetime
+
+
 class PublicUser(BaseUser):
     id: UUID
     created_at: datetime
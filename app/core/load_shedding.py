@@ -0,0 +1,85 @@
+import asyncio
+import json
+import time
+
+from app.database.config import SecuritySettings as settings
+
+
+class LoadMonitor:
+    """Load readings of this worker: event loop lag and requests in flight.
+
+    The lag is how late the loop wakes up from a timed sleep. A loop saturated
+    by callbacks (or blocked by synchronous work) wakes its sleepers late, so
+    it is a direct reading of how long any request waits before it runs.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.lag = 0.0
+        self.in_flight = 0
+        self.shed = 0
+
+    async def run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, time.perf_counter() - started - self.interval)
+
+
+class LoadSheddingMiddleware:
+    """Reject requests up front while the worker is overloaded.
+
+    A request is answered 503 with Retry-After, before any routing or database
+    work, when the event loop lag is over the threshold or when
+    `max_concurrency` requests are already in flight. Paths under the exempt
+    prefixes (internal metrics) are always served.
+    """
+
+    def __init__(
+        self,
+        app,
+        monitor: LoadMonitor,
+        max_lag: float,
+        max_concurrency: int,
+        exempt_prefixes: tuple[str, ...] = ("/internal",),
+    ):
+        self.app = app
+        self.monitor = monitor
+        self.max_lag = max_lag
+        self.max_concurrency = max_concurrency
+        self.exempt_prefixes = exempt_prefixes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_prefixes):
+            await self.app(scope, receive, send)
+            return
+        monitor = self.monitor
+        if monitor.lag > self.max_lag or monitor.in_flight >= self.max_concurrency:
+            monitor.shed += 1
+            await self._reject(send)
+            return
+        monitor.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            monitor.in_flight -= 1
+
+    async def _reject(self, send):
+        body = json.dumps(
+            {"detail": "The server is overloaded right now, try again in a moment."}
+        ).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", b"1"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+load_monitor = LoadMonitor(settings().EVENT_LOOP_LAG_SAMPLE_SECONDS)
@@ -0,0 +1,288 @@
+import logging
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Statements per request: a route whose count grows with the page size is
+# running one query per row.
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Requests that match no route share one label, so scanners probing random
+# paths cannot grow the series without bound.
+UNMATCHED_ROUTE = "unmatched"
+
+# The slow-request log keeps at most this many statements per request, each
+# cut to MAX_LOGGED_STATEMENT_LENGTH characters.
+MAX_LOGGED_STATEMENTS = 100
+MAX_LOGGED_STATEMENT_LENGTH = 500
+
+_QUERY_STARTED = "metrics_query_started"
+
+
+@dataclass
+class RequestStats:
+    statements: int = 0
+    statement_seconds: float = 0.0
+    redis_commands: int = 0
+    # Only collected when the slow-request log is enabled.
+    executed: list[tuple[float, str]] | None = None
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def record_redis_commands(count: int):
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.redis_commands += count
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_QUERY_STARTED, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info[_QUERY_STARTED].pop()
+    stats = _request_stats.get()
+    if stats is None:
+        return
+    stats.statements += 1
+    stats.statement_seconds += elapsed
+    if stats.executed is not None and len(stats.executed) < MAX_LOGGED_STATEMENTS:
+        stats.executed.append((elapsed, statement[:MAX_LOGGED_STATEMENT_LENGTH]))
+
+
+def _handle_error(context):
+    started = (
+        context.connection.info.get(_QUERY_STARTED) if context.connection else None
+    )
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine: AsyncEngine):
+    """Attribute every statement run on `engine` to the request running it."""
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            total += count
+            yield bound, total
+
+
+@dataclass
+class RouteMetrics:
+    latency: Histogram = field(default_factory=lambda: Histogram(LATENCY_BUCKETS))
+    statements: Histogram = field(default_factory=lambda: Histogram(STATEMENT_BUCKETS))
+    responses: dict[int, int] = field(default_factory=dict)
+    errors: int = 0
+    statement_seconds: float = 0.0
+    redis_commands: int = 0
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return (
+        "{"
+        + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+        + "}"
+    )
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+class MetricsRegistry:
+    """Per-route request metrics of this worker, in Prometheus text format.
+
+    Each worker process keeps its own registry; Prometheus scrapes every
+    worker and sums the series.
+    """
+
+    def __init__(self):
+        self.routes: dict[tuple[str, str], RouteMetrics] = {}
+
+    def observe(
+        self, method: str, route: str, status: int, seconds: float, stats: RequestStats
+    ):
+        metrics = self.routes.get((method, route))
+        if metrics is None:
+            metrics = self.routes[(method, route)] = RouteMetrics()
+        metrics.latency.observe(seconds)
+        metrics.statements.observe(stats.statements)
+        metrics.responses[status] = metrics.responses.get(status, 0) + 1
+        if status >= 500:
+            metrics.errors += 1
+        metrics.statement_seconds += stats.statement_seconds
+        metrics.redis_commands += stats.redis_commands
+
+    def render(self) -> str:
+        lines = []
+
+        def family(name: str, kind: str, help: str):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name: str, select):
+            for (method, route), metrics in self.routes.items():
+                observed = select(metrics)
+                for bound, count in observed.cumulative():
+                    labels = _labels(
+                        method=method, route=route, le=_format_bound(bound)
+                    )
+                    lines.append(f"{name}_bucket{labels} {count}")
+                labels = _labels(method=method, route=route)
+                lines.append(f"{name}_sum{labels} {observed.sum}")
+                lines.append(f"{name}_count{labels} {observed.count}")
+
+        def counter(name: str, select):
+            for (method, route), metrics in self.routes.items():
+                labels = _labels(method=method, route=route)
+                lines.append(f"{name}{labels} {select(metrics)}")
+
+        family(
+            "http_request_duration_seconds",
+            "histogram",
+            "Time from receiving a request to sending the last byte of its response.",
+        )
+        histogram("http_request_duration_seconds", lambda m: m.latency)
+
+        family("http_requests_total", "counter", "Responses sent, by status code.")
+        for (method, route), metrics in self.routes.items():
+            for status, count in sorted(metrics.responses.items()):
+                labels = _labels(method=method, route=route, status=status)
+                lines.append(f"http_requests_total{labels} {count}")
+
+        family(
+            "http_request_errors_total",
+            "counter",
+            "Requests answered with a 5xx status or failed with an exception.",
+        )
+        counter("http_request_errors_total", lambda m: m.errors)
+
+        family(
+            "db_statements_per_request",
+            "histogram",
+            "SQL statements executed while serving one request.",
+        )
+        histogram("db_statements_per_request", lambda m: m.statements)
+
+        family(
+            "db_statement_seconds_total",
+            "counter",
+            "Time spent executing SQL statements.",
+        )
+        counter("db_statement_seconds_total", lambda m: m.statement_seconds)
+
+        family("redis_commands_total", "counter", "Redis commands sent.")
+        counter("redis_commands_total", lambda m: m.redis_commands)
+
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Record the latency, status, SQL statements and Redis commands per route.
+
+    Requests are labelled with their route template (/publications/{id}), not
+    the raw path. When `slow_request_seconds` is set, requests that take
+    longer are logged along with the statements they executed.
+    """
+
+    def __init__(
+        self, app, registry: MetricsRegistry, slow_request_seconds: float | None
+    ):
+        self.app = app
+        self.registry = registry
+        self.slow_request_seconds = slow_request_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats(
+            executed=[] if self.slow_request_seconds is not None else None
+        )
+        token = _request_stats.set(stats)
+        # Stays 500 when the application raises before starting a response.
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            seconds = time.perf_counter() - started
+            _request_stats.reset(token)
+            route = scope.get("route")
+            route_path = route.path if route is not None else UNMATCHED_ROUTE
+            self.registry.observe(scope["method"], route_path, status, seconds, stats)
+            if (
+                self.slow_request_seconds is not None
+                and seconds >= self.slow_request_seconds
+            ):
+                self._log_slow_request(scope, route_path, status, seconds, stats)
+
+    def _log_slow_request(
+        self,
+        scope,
+        route_path: str,
+        status: int,
+        seconds: float,
+        stats: RequestStats,
+    ):
+        executed = "".join(
+            f"\n  [{elapsed * 1000:.1f} ms] {statement}"
+            for elapsed, statement in stats.executed
+        )
+        if stats.statements > len(stats.executed):
+            executed += f"\n  ... {stats.statements - len(stats.executed)} more"
+        logger.warning(
+            "Slow request: %s %s (%s) -> %s in %.1f ms, %d SQL statements in "
+            "%.1f ms, %d Redis commands.%s",
+            scope["method"],
+            scope["path"],
+            route_path,
+            status,
+            seconds * 1000,
+            stats.statements,
+            stats.statement_seconds * 1000,
+            stats.redis_commands,
+            executed,
+        )
+
+
+metrics_registry = MetricsRegistry()
@@ -0,0 +1,45 @@
+from collections import OrderedDict
+from time import monotonic
+from uuid import UUID
+
+from app.api.schemas.user import Principal
+from app.database.config import SecuritySettings as settings
+
+
+class PrincipalCache:
+    """Short-lived in-process LRU of authenticated principals, by user id.
+
+    Entries are dropped by UserService when the user changes or is deleted.
+    Other workers only see those changes once their entry expires, which is
+    why the TTL is kept short.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[UUID, tuple[float, Principal]] = OrderedDict()
+
+    def get(self, user_id: UUID) -> Principal | None:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, principal = entry
+        if expires_at < monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return principal
+
+    def set(self, principal: Principal):
+        self._entries[principal.id] = (monotonic() + self.ttl, principal)
+        self._entries.move_to_end(principal.id)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def forget(self, user_id: UUID):
+        self._entries.pop(user_id, None)
+
+
+principal_cache = PrincipalCache(
+    settings().PRINCIPAL_CACHE_TTL_SECONDS, settings().PRINCIPAL_CACHE_SIZE
+)
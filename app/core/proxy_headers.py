@@ -0,0 +1,45 @@
+from ipaddress import ip_address, ip_network
+
+
+class ProxyHeadersMiddleware:
+    """Use the X-Forwarded-For client address when a trusted proxy sent it.
+
+    Behind a proxy, the peer of every connection is the proxy, so the client
+    address has to come from the header. The hops are read right to left and
+    the first one that is not a trusted proxy is the client, which means only
+    the hops appended by trusted proxies are believed and a client cannot
+    pick its own address. `trusted` holds addresses or networks, "*" trusts
+    every peer.
+    """
+
+    def __init__(self, app, trusted: list[str]):
+        self.app = app
+        self.trust_all = "*" in trusted
+        self.networks = [
+            ip_network(network, strict=False) for network in trusted if network != "*"
+        ]
+
+    def _is_trusted(self, host: str) -> bool:
+        if self.trust_all:
+            return True
+        try:
+            address = ip_address(host)
+        except ValueError:
+            return False
+        return any(address in network for network in self.networks)
+
+    async def __call__(self, scope, receive, send):
+        client = scope.get("client")
+        if scope["type"] == "http" and client and self._is_trusted(client[0]):
+            forwarded = b",".join(
+                value for name, value in scope["headers"] if name == b"x-forwarded-for"
+            ).decode("latin-1")
+            hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+            if hops:
+                host = next(
+                    (hop for hop in reversed(hops) if not self._is_trusted(hop)),
+                    hops[0],
+                )
+                # updated in place: outer middlewares read the same scope
+                scope["client"] = (host, 0)
+        await self.app(scope, receive, send)
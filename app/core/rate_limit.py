@@ -0,0 +1,105 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from redis.exceptions import RedisError
+
+from app.database.config import SecuritySettings as settings
+from app.database.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Token bucket stored as a hash {tokens, updated_at}. The refill, the check and
+# the spend happen in one script, so concurrent workers can never overspend,
+# and the clock is Redis' own so workers with skewed clocks agree.
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill_per_second = tonumber(ARGV[2])
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - updated_at) * refill_per_second)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / refill_per_second
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / refill_per_second) + 1)
+return tostring(retry_after)
+"""
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    capacity: int
+    period_seconds: int
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        """Parse limits written as "<requests>/<second|minute|hour|day>"."""
+        requests, period = value.split("/")
+        return cls(int(requests), _PERIODS[period.strip()])
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.capacity / self.period_seconds
+
+
+class RateLimiter:
+    """Token buckets shared by every worker through Redis.
+
+    While Redis is unavailable each worker falls back to its own in-memory
+    buckets (the `fallback_size` most recently used), so limits keep holding
+    per process instead of being lifted.
+    """
+
+    def __init__(self, fallback_size: int):
+        self._script = redis_client.register_script(_TOKEN_BUCKET_SCRIPT)
+        self._fallback_size = fallback_size
+        self._fallback: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def hit(self, key: str, limit: RateLimit) -> float | None:
+        """Spend one token; return the seconds to wait when there is none."""
+        try:
+            retry_after = float(
+                await self._script(
+                    keys=[f"rate_limit:{key}"],
+                    args=[limit.capacity, limit.refill_per_second],
+                )
+            )
+        except RedisError:
+            retry_after = self._hit_locally(key, limit)
+        return retry_after or None
+
+    def _hit_locally(self, key: str, limit: RateLimit) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self._fallback.pop(key, (limit.capacity, now))
+        tokens = min(
+            limit.capacity, tokens + (now - updated_at) * limit.refill_per_second
+        )
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / limit.refill_per_second
+        self._fallback[key] = (tokens, now)
+        if len(self._fallback) > self._fallback_size:
+            self._fallback.popitem(last=False)
+        return retry_after
+
+
+def retry_after_header(seconds: float) -> dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+
+rate_limits = {
+    name: RateLimit.parse(value) for name, value in settings().RATE_LIMITS.items()
+}
+rate_limiter = RateLimiter(settings().RATE_LIMIT_FALLBACK_SIZE)
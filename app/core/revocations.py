@@ -0,0 +1,138 @@
+import asyncio
+import logging
+from time import monotonic, time
+from redis.exceptions import RedisError
+
+from app.database.config import SecuritySettings as settings
+from app.database.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+_MAX_RECONNECT_DELAY_SECONDS = 30.0
+
+# jti -> expiry of its token
+REVOKED_TOKENS_KEY = "revoked_tokens"
+# user id -> tokens issued up to this timestamp are revoked
+REVOKED_USERS_KEY = "revoked_users"
+REVOKED_TOKENS_CHANNEL = "revoked_tokens:events"
+
+_TOKEN_LIFETIME = settings().ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+
+class RevokedTokenMirror:
+    """In-process copy of the revoked tokens, so verifying a token needs no I/O.
+
+    Redis keeps two sorted sets: single revoked jtis scored by their token's
+    expiry, and per-user "issued before" cutoffs scored by the cutoff itself.
+    Entries are pruned as soon as every token they could match has expired, so
+    the store stays bounded by the number of live tokens. Every revocation is
+    also published on a channel that each worker listens to. A worker reloads
+    both sets right after (re)subscribing and every `resync_interval` seconds,
+    so messages missed during a disconnect cannot leave it out of date. While
+    it is not in sync, lookups go to Redis.
+    """
+
+    def __init__(self, resync_interval: float):
+        self.resync_interval = resync_interval
+        self._revoked: dict[str, float] = {}
+        self._users: dict[str, float] = {}
+        self._synced = False
+
+    def __len__(self) -> int:
+        return len(self._revoked) + len(self._users)
+
+    async def _store(self, key: str, member: str, score: float, kind: str):
+        now = time()
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.zadd(key, {member: score})
+            pipe.zremrangebyscore(REVOKED_TOKENS_KEY, "-inf", now)
+            pipe.zremrangebyscore(REVOKED_USERS_KEY, "-inf", now - _TOKEN_LIFETIME)
+            pipe.publish(REVOKED_TOKENS_CHANNEL, f"{kind} {member} {score}")
+            await pipe.execute()
+
+    async def revoke(self, jti: str, expires_at: float):
+        self._revoked[jti] = expires_at
+        await self._store(REVOKED_TOKENS_KEY, jti, expires_at, "jti")
+
+    async def revoke_user(self, user_id: str, issued_before: float | None = None):
+        """Revoke every token of the user issued up to `issued_before` (now)."""
+        issued_before = issued_before or time()
+        self._users[user_id] = issued_before
+        await self._store(REVOKED_USERS_KEY, user_id, issued_before, "user")
+
+    async def is_revoked(self, jti: str, user_id: str, issued_at: float) -> bool:
+        if self._synced:
+            return jti in self._revoked or issued_at <= self._users.get(user_id, 0)
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.zscore(REVOKED_TOKENS_KEY, jti)
+            pipe.zscore(REVOKED_USERS_KEY, user_id)
+            revoked, issued_before = await pipe.execute()
+        return revoked is not None or issued_at <= (issued_before or 0)
+
+    async def resync(self):
+        now = time()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.zrangebyscore(REVOKED_TOKENS_KEY, now, "+inf", withscores=True)
+            pipe.zrangebyscore(
+                REVOKED_USERS_KEY, now - _TOKEN_LIFETIME, "+inf", withscores=True
+            )
+            revoked, users = await pipe.execute()
+        self._revoked, self._users = dict(revoked), dict(users)
+        self._synced = True
+
+    async def memory_usage(self) -> dict:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key in (REVOKED_TOKENS_KEY, REVOKED_USERS_KEY):
+                pipe.zcard(key)
+                pipe.memory_usage(key)
+            tokens, tokens_bytes, users, users_bytes = await pipe.execute()
+        return {
+            "revoked_tokens": tokens,
+            "revoked_tokens_bytes": tokens_bytes or 0,
+            "revoked_users": users,
+            "revoked_users_bytes": users_bytes or 0,
+            "local_entries": len(self),
+        }
+
+    def _apply(self, message: str):
+        kind, member, score = message.rsplit(" ", 2)
+        target = self._revoked if kind == "jti" else self._users
+        target[member] = max(float(score), target.get(member, 0))
+
+    async def run(self):
+        """Follow the channel until cancelled.
+
+        Any failure (Redis, or a message that cannot be parsed) drops the
+        mirror out of sync, so lookups go to Redis, and reconnects with a
+        growing delay; reconnecting reloads both sets.
+        """
+        delay = 1.0
+        while True:
+            try:
+                async with redis_client.pubsub() as pubsub:
+                    await pubsub.subscribe(REVOKED_TOKENS_CHANNEL)
+                    # subscribed first, so nothing revoked during the load is missed
+                    await self.resync()
+                    last_resync = monotonic()
+                    delay = 1.0
+                    while True:
+                        message = await pubsub.get_message(
+                            ignore_subscribe_messages=True,
+                            timeout=self.resync_interval,
+                        )
+                        if message:
+                            self._apply(message["data"])
+                        if monotonic() - last_resync >= self.resync_interval:
+                            await self.resync()
+                            last_resync = monotonic()
+            except RedisError:
+                self._synced = False
+                logger.warning("Lost the revoked tokens channel, reconnecting.")
+            except Exception:
+                self._synced = False
+                logger.exception("Revoked tokens mirror failed, reconnecting.")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _MAX_RECONNECT_DELAY_SECONDS)
+
+
+revoked_tokens = RevokedTokenMirror(settings().REVOKED_TOKENS_RESYNC_SECONDS)
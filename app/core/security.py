@@ -1,3 +1,60 @@
-from fastapi.security import OAuth2PasswordBearer
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
+from passlib.context import CryptContext
+
+from app.database.config import SecuritySettings as settings
 
 oauth2_scheme = OAuth2PasswordBearer("/users/login")
+optional_oauth2_scheme = OAuth2PasswordBearer("/users/login", auto_error=False)
+internal_token_header = APIKeyHeader(name="X-Internal-Token", auto_error=False)
+
+password_context = CryptContext(deprecated="auto", schemes="bcrypt")
+
+
+class PasswordHasher:
+    """Runs bcrypt off the event loop, in a bounded thread pool.
+
+    bcrypt releases the GIL, so hashes run in parallel on the pool while the
+    loop keeps serving other requests. At most `workers` hashes run at once and
+    at most `queue_size` more wait for a thread; beyond that the request is
+    rejected with a 503 instead of queueing without bound.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hasher"
+        )
+        self._capacity = workers + queue_size
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def _run(self, function, *args):
+        if self._in_flight >= self._capacity:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests right now, try again in a moment.",
+                headers={"Retry-After": "1"},
+            )
+        self._in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, function, *args
+            )
+        finally:
+            self._in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(password_context.hash, password)
+
+    async def verify(self, password: str, password_hashed: str) -> bool:
+        return await self._run(password_context.verify, password, password_hashed)
+
+
+password_hasher = PasswordHasher(
+    settings().PASSWORD_HASH_WORKERS, settings().PASSWORD_HASH_QUEUE_SIZE
+)
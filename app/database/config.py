@@ -1,9 +1,17 @@
+from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 _base_config = SettingsConfigDict(
     env_file="./.env", env_ignore_empty=True, extra="ignore"
 )
 
+DEFAULT_RATE_LIMITS = {
+    "auth": "10/minute",
+    "reaction": "60/minute",
+    "search": "60/minute",
+    "import": "10/hour",
+}
+
 
 class DatabaseSettings(BaseSettings):
     model_config = _base_config
@@ -15,13 +23,90 @@ class DatabaseSettings(BaseSettings):
 
     REDIS_HOST: str
     REDIS_PORT: str
+    REDIS_DB: int = 0
+
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Requests slower than this are logged with the SQL they executed; unset
+    # disables the log (and the per-statement bookkeeping behind it).
+    SLOW_REQUEST_LOG_SECONDS: float | None = None
+
+    # Optional streaming replica of the primary (same database and credentials)
+    # serving the read-only publication routes.
+    REPLICA_POSTGRES_HOST: str | None = None
+    REPLICA_POSTGRES_PORT: int | None = None
+    REPLICA_MAX_LAG_SECONDS: float = 2.0
+    REPLICA_HEALTH_CHECK_INTERVAL_SECONDS: float = 1.0
+    # After writing, a user reads from the primary for this long.
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+
+    COUNTER_FLUSH_INTERVAL_SECONDS: float = 5.0
+    VIEW_FLUSH_INTERVAL_SECONDS: float = 1.0
+    VIEW_BATCH_SIZE: int = 500
+    FEED_CACHE_TTL_SECONDS: int = 30
+    BLOCKED_TAGS_CACHE_TTL_SECONDS: int = 3600
+    BLOCKED_USERS_CACHE_TTL_SECONDS: int = 3600
+    IMPORT_BATCH_SIZE: int = 1000
+    TRENDING_HALF_LIFE_HOURS: float = 6.0
+    TRENDING_SIZE: int = 1000
+    TRENDING_MAINTENANCE_INTERVAL_SECONDS: float = 60.0
 
     @property
     def db_url(self):
         return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    @property
+    def replica_db_url(self):
+        if not self.REPLICA_POSTGRES_HOST:
+            return None
+        port = self.REPLICA_POSTGRES_PORT or self.POSTGRES_PORT
+        return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.REPLICA_POSTGRES_HOST}:{port}/{self.POSTGRES_DB}"
+
 
 class SecuritySettings(BaseSettings):
     model_config = _base_config
     JWT_SECRET: str
     JWT_ALGORITHM: str
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24
+
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_SIZE: int = 16
+
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0
+    PRINCIPAL_CACHE_SIZE: int = 10000
+
+    REVOKED_TOKENS_RESYNC_SECONDS: float = 60.0
+
+    # "<requests>/<second|minute|hour|day>" per rate-limited route group,
+    # counted per user when authenticated and per client IP otherwise. An
+    # override only needs the groups it changes.
+    RATE_LIMITS: dict[str, str] = DEFAULT_RATE_LIMITS
+    RATE_LIMIT_FALLBACK_SIZE: int = 10000
+
+    # Peers (addresses or networks, "*" for any) whose X-Forwarded-For header
+    # is believed. Set it to the deployment's proxies, or every client behind
+    # them shares the proxy's address, and its rate limits.
+    TRUSTED_PROXIES: list[str] = ["127.0.0.1"]
+
+    # Shared secret for the /internal endpoints, sent as X-Internal-Token.
+    # They answer 404 while it is unset.
+    INTERNAL_API_TOKEN: str | None = None
+
+    @field_validator("RATE_LIMITS")
+    @classmethod
+    def merge_rate_limits(cls, limits: dict[str, str]) -> dict[str, str]:
+        unknown = limits.keys() - DEFAULT_RATE_LIMITS.keys()
+        if unknown:
+            raise ValueError(
+                f"unknown rate limit groups {sorted(unknown)}, expected some of "
+                f"{sorted(DEFAULT_RATE_LIMITS)}"
+            )
+        return {**DEFAULT_RATE_LIMITS, **limits}
+
+    EVENT_LOOP_LAG_SAMPLE_SECONDS: float = 0.05
+    MAX_EVENT_LOOP_LAG_SECONDS: float = 0.25
+    MAX_CONCURRENT_REQUESTS: int = 1000
@@ -0,0 +1,27 @@
+from enum import Enum
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.database.models import Publication, User
+
+
+class PublicationLoad(str, Enum):
+    """Which relationships a publication query loads up front."""
+
+    summary = "summary"  # columns only
+    with_creator = "with_creator"  # plus the creator's row
+    full = "full"  # plus the creator and the users who reacted
+
+
+def publication_loading(profile: PublicationLoad = PublicationLoad.summary) -> list:
+    if profile == PublicationLoad.summary:
+        return []
+    creator = joinedload(Publication.creator).load_only(
+        User.id, User.name, User.nickname, User.created_at
+    )
+    if profile == PublicationLoad.with_creator:
+        return [creator]
+    return [
+        creator,
+        selectinload(Publication.users_that_liked),
+        selectinload(Publication.users_that_disliked),
+    ]
@@ -1,7 +1,7 @@
 from enum import Enum
 from typing import List, Optional
 from uuid import UUID, uuid4
-from sqlalchemy import Column
+from sqlalchemy import Column, Index
 from sqlmodel import Field, Relationship, SQLModel
 from sqlalchemy.dialects import postgresql
 from datetime import datetime
@@ -25,28 +25,64 @@ class Tags(str, Enum):
     free_time = "Free Time"
 
 
+# Relationships never load implicitly: queries opt into what they need through
+# the profiles in app.database.loading, and any other access raises.
+_NO_IMPLICIT_LOADS = {"lazy": "raise"}
+# Collections are removed by the database's ON DELETE CASCADE, so deleting a
+# row does not have to load them first.
+_NO_IMPLICIT_COLLECTION_LOADS = {"lazy": "raise", "passive_deletes": True}
+
+
 class Blocked_Tags(SQLModel, table=True):
-    user_id: UUID = Field(default=None, foreign_key="user.id", primary_key=True)
+    user_id: UUID = Field(
+        default=None, foreign_key="user.id", primary_key=True, ondelete="CASCADE"
+    )
     tag: Tags = Field(sa_column_kwargs={"nullable": False}, primary_key=True)
-    users: Optional["User"] = Relationship(back_populates="blocked_tags")
+    users: Optional["User"] = Relationship(
+        back_populates="blocked_tags", sa_relationship_kwargs=_NO_IMPLICIT_LOADS
+    )
+
+
+class Blocked_Users(SQLModel, table=True):
+    __table_args__ = (Index("ix_blocked_users_blocked_user_id", "blocked_user_id"),)
+    user_id: UUID = Field(foreign_key="user.id", primary_key=True, ondelete="CASCADE")
+    blocked_user_id: UUID = Field(
+        foreign_key="user.id", primary_key=True, ondelete="CASCADE"
+    )
 
 
 class LikedPublicationAndUsers(SQLModel, table=True):
-    publication_id: int = Field(foreign_key="publications.id", primary_key=True)
-    user_id: UUID = Field(foreign_key="user.id", primary_key=True)
+    __table_args__ = (Index("ix_likedpublicationandusers_user_id", "user_id"),)
+    publication_id: int = Field(
+        foreign_key="publications.id", primary_key=True, ondelete="CASCADE"
+    )
+    user_id: UUID = Field(foreign_key="user.id", primary_key=True, ondelete="CASCADE")
 
 
 class DislikedPublicationAndUsers(SQLModel, table=True):
-    publication_id: int = Field(foreign_key="publications.id", primary_key=True)
-    user_id: UUID = Field(foreign_key="user.id", primary_key=True)
+    __table_args__ = (Index("ix_dislikedpublicationandusers_user_id", "user_id"),)
+    publication_id: int = Field(
+        foreign_key="publications.id", primary_key=True, ondelete="CASCADE"
+    )
+    user_id: UUID = Field(foreign_key="user.id", primary_key=True, ondelete="CASCADE")
 
 
 class Publication(SQLModel, table=True):
     __tablename__ = "publications"
+    __table_args__ = (
+        Index("ix_publications_published_at_id", "published_at", "id"),
+        Index("ix_publications_tag_published_at_id", "tag", "published_at", "id"),
+        Index(
+            "ix_publications_creator_id_published_at_id",
+            "creator_id",
+            "published_at",
+            "id",
+        ),
+    )
     id: int | None = Field(default=None, primary_key=True)
-    creator_id: UUID = Field(foreign_key="user.id")
+    creator_id: UUID = Field(foreign_key="user.id", ondelete="CASCADE")
     creator: "User" = Relationship(
-        back_populates="publications", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="publications", sa_relationship_kwargs=_NO_IMPLICIT_LOADS
     )
     tag: Tags | None = Field(default=Tags.others)
     title: str = Field(max_length=100)
@@ -57,13 +93,31 @@ class Publication(SQLModel, table=True):
     published_at: datetime
     last_update_at: datetime | None = Field(default=None)
     users_that_liked: List["User"] = Relationship(
-        back_populates="liked_publications", link_model=LikedPublicationAndUsers
+        back_populates="liked_publications",
+        link_model=LikedPublicationAndUsers,
+        sa_relationship_kwargs=_NO_IMPLICIT_COLLECTION_LOADS,
     )
     users_that_disliked: List["User"] = Relationship(
-        back_populates="disliked_publications", link_model=DislikedPublicationAndUsers
+        back_populates="disliked_publications",
+        link_model=DislikedPublicationAndUsers,
+        sa_relationship_kwargs=_NO_IMPLICIT_COLLECTION_LOADS,
     )
 
 
+# Text search configuration search_vector is built with (see migration 0002).
+SEARCH_CONFIG = "simple"
+
+# Filled in from title and description by a trigger (migration 0002) and only
+# read by the search query, so it lives on the table without being mapped on
+# the model (plain reads never fetch it, inserts leave it to the trigger).
+Publication.__table__.append_column(Column("search_vector", postgresql.TSVECTOR))
+Index(
+    "ix_publications_search_vector",
+    Publication.__table__.c.search_vector,
+    postgresql_using="gin",
+)
+
+
 class User(SQLModel, table=True):
     __tablename__ = "user"
     id: UUID = Field(
@@ -75,16 +129,46 @@ class User(SQLModel, table=True):
     password_hashed: str
     publications: List["Publication"] = Relationship(
         back_populates="creator",
-        sa_relationship_kwargs={"lazy": "selectin", "cascade": "all, delete-orphan"},
+        sa_relationship_kwargs={
+            **_NO_IMPLICIT_COLLECTION_LOADS,
+            "cascade": "all, delete-orphan",
+        },
     )
     created_at: datetime
 
-    blocked_tags: List[Blocked_Tags] = Relationship(back_populates="users")
+    blocked_tags: List[Blocked_Tags] = Relationship(
+        back_populates="users", sa_relationship_kwargs=_NO_IMPLICIT_COLLECTION_LOADS
+    )
 
     liked_publications: List["Publication"] = Relationship(
-        back_populates="users_that_liked", link_model=LikedPublicationAndUsers
+        back_populates="users_that_liked",
+        link_model=LikedPublicationAndUsers,
+        sa_relationship_kwargs=_NO_IMPLICIT_COLLECTION_LOADS,
     )
 
     disliked_publications: List["Publication"] = Relationship(
-        back_populates="users_that_disliked", link_model=DislikedPublicationAndUsers
+        back_populates="users_that_disliked",
+        link_model=DislikedPublicationAndUsers,
+        sa_relationship_kwargs=_NO_IMPLICIT_COLLECTION_LOADS,
     )
+
+
+class CounterFlush(SQLModel, table=True):
+    __tablename__ = "counter_flushes"
+    batch_id: str = Field(primary_key=True)
+    flushed_at: datetime
+
+
+class CounterDelta(SQLModel, table=True):
+    """Counter deltas committed with the change that caused them.
+
+    Rows are relayed to the Redis buffer and deleted by the counter flusher;
+    see app.services.counters.
+    """
+
+    __tablename__ = "counter_deltas"
+    id: int | None = Field(default=None, primary_key=True)
+    publication_id: int = Field(foreign_key="publications.id", ondelete="CASCADE")
+    likes: int = Field(default=0)
+    dislikes: int = Field(default=0)
+    views: int = Field(default=0)
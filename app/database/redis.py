@@ -1,12 +1,54 @@
 from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from app.core.metrics import record_redis_commands
 from app.database.config import DatabaseSettings as settings
 
-_token_blacklist = Redis(host=settings().REDIS_HOST, port=settings().REDIS_PORT, db=0)
 
+class InstrumentedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        record_redis_commands(len(self.command_stack))
+        return await super().execute(raise_on_error)
 
-async def add_jti_to_blacklist(jti: str):
-    await _token_blacklist.set(jti, "blacklisted")
 
+class InstrumentedRedis(Redis):
+    """Redis client that counts the commands sent on behalf of each request."""
 
-async def is_jti_blacklisted(jti: str):
-    return await _token_blacklist.exists(jti)
+    async def execute_command(self, *args, **options):
+        record_redis_commands(1)
+        return await super().execute_command(*args, **options)
+
+    def pipeline(self, transaction: bool = True, shard_hint: str | None = None):
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+redis_client = InstrumentedRedis(
+    host=settings().REDIS_HOST,
+    port=settings().REDIS_PORT,
+    db=settings().REDIS_DB,
+    decode_responses=True,
+)
+
+# Left by flush_scratch_database, naming the suite that owns the database.
+SCRATCH_MARKER_KEY = "scratch_database"
+
+
+async def flush_scratch_database(owner: str):
+    """FLUSHDB, but only a database that is empty or that `owner` flushed before.
+
+    The tests and benchmarks wipe Redis before every run. The marker they
+    leave behind is what keeps them from wiping a database that holds
+    anything else, such as a dev or staging instance on the same host.
+    Raises RuntimeError without touching the database otherwise.
+    """
+    if await redis_client.get(SCRATCH_MARKER_KEY) != owner and (
+        await redis_client.dbsize()
+    ):
+        raise RuntimeError(
+            f"Refusing to flush Redis database {settings().REDIS_DB}: it is not "
+            f"empty and was not flushed by {owner} before. Point REDIS_DB at an "
+            "empty database."
+        )
+    await redis_client.flushdb()
+    await redis_client.set(SCRATCH_MARKER_KEY, owner)
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from uuid import UUID
+from redis.exceptions import RedisError
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+
+from .config import DatabaseSettings as settings
+from .redis import redis_client
+from .session import async_session, replica_session
+
+logger = logging.getLogger(__name__)
+
+_WROTE = "wrote"
+_FROM_REPLICA = "from_replica"
+_CHECK_TIMEOUT_SECONDS = 2.0
+
+# Seconds the replica is behind the primary. A replica that has replayed all
+# the WAL it received is caught up even when its last replayed transaction is
+# old (an idle primary), and a server that is not in recovery is the primary.
+_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(
+            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+        )
+    END
+    """
+)
+
+
+def _record_flush(session, flush_context):
+    session.info[_WROTE] = True
+
+
+def _record_execute(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info[_WROTE] = True
+
+
+event.listen(Session, "after_flush", _record_flush)
+event.listen(Session, "do_orm_execute", _record_execute)
+
+
+def wrote(session: AsyncSession) -> bool:
+    """Whether `session` flushed or executed anything other than a SELECT."""
+    return session.info.get(_WROTE, False)
+
+
+def _recent_writer_key(user_id: UUID) -> str:
+    return f"recent_writer:{user_id}"
+
+
+class ReplicaRouter:
+    """Route read-only sessions to the replica while it is safe to.
+
+    Reads go to the primary when no replica is configured, when the last
+    health check failed or measured more than `max_lag` seconds of lag, and
+    for `sticky_seconds` after the reader wrote something, so users always
+    see their own writes. The window never drops below the staleness a
+    replica may have between two checks.
+    """
+
+    def __init__(
+        self,
+        replica: sessionmaker | None,
+        max_lag: float,
+        interval: float,
+        sticky_seconds: float,
+    ):
+        self.replica = replica
+        self.max_lag = max_lag
+        self.interval = interval
+        self.sticky_seconds = max(sticky_seconds, max_lag + interval)
+        self.available = False
+        self.lag: float | None = None
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.replica is not None
+
+    async def run(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
+
+    async def check(self):
+        try:
+            self.lag = await asyncio.wait_for(
+                self._measure_lag(), timeout=_CHECK_TIMEOUT_SECONDS
+            )
+        except (SQLAlchemyError, OSError, asyncio.TimeoutError):
+            if self.available:
+                logger.warning("Replica unreachable, reads go to the primary.")
+            self.lag = None
+            self.available = False
+            return
+        available = self.lag <= self.max_lag
+        if available != self.available:
+            logger.warning(
+                "Replica lag is %.1fs, reads go to the %s.",
+                self.lag,
+                "replica" if available else "primary",
+            )
+        self.available = available
+
+    async def _measure_lag(self) -> float:
+        async with self.replica() as session:
+            return float((await session.execute(_LAG_QUERY)).scalar_one())
+
+    async def record_write(self, user_id: UUID):
+        if not self.enabled:
+            return
+        try:
+            await redis_client.set(
+                _recent_writer_key(user_id), 1, px=int(self.sticky_seconds * 1000)
+            )
+        except RedisError:
+            logger.warning("Redis unavailable, a recent write was not recorded.")
+
+    async def _wrote_recently(self, user_id: UUID) -> bool:
+        try:
+            return bool(await redis_client.exists(_recent_writer_key(user_id)))
+        except RedisError:
+            # Without the record there is no telling, so stay consistent.
+            return True
+
+    async def _use_replica(self, user_id: UUID | None) -> bool:
+        if not self.available:
+            return False
+        return user_id is None or not await self._wrote_recently(user_id)
+
+    @asynccontextmanager
+    async def session(self, user_id: UUID | None = None):
+        """Open a session for reads on behalf of `user_id` (None when anonymous).
+
+        A connection or driver error on the replica takes it out of rotation
+        until the next successful check; the failing request is not retried.
+        """
+        if not await self._use_replica(user_id):
+            self.primary_reads += 1
+            async with async_session() as session:
+                yield session
+            return
+        self.replica_reads += 1
+        async with self.replica() as session:
+            session.info[_FROM_REPLICA] = True
+            try:
+                yield session
+            except (DBAPIError, OSError):
+                logger.warning("Replica query failed, reads go to the primary.")
+                self.available = False
+                raise
+
+    def may_cache(self, session: AsyncSession, changed_at: datetime | None) -> bool:
+        """Whether what `session` read can be stored in a shared cache.
+
+        Right after a change the replica may still return the old rows, and
+        caching them would undo the invalidation the change just made.
+        """
+        if not session.info.get(_FROM_REPLICA) or changed_at is None:
+            return True
+        return time.time() - changed_at.timestamp() > self.max_lag + self.interval
+
+    def metrics(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "available": self.available,
+            "lag_seconds": self.lag,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+        }
+
+
+_settings = settings()
+replica_router = ReplicaRouter(
+    replica_session,
+    max_lag=_settings.REPLICA_MAX_LAG_SECONDS,
+    interval=_settings.REPLICA_HEALTH_CHECK_INTERVAL_SECONDS,
+    sticky_seconds=_settings.READ_YOUR_WRITES_SECONDS,
+)
@@ -1,20 +1,64 @@
+from pathlib import Path
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlmodel import SQLModel
 from .config import DatabaseSettings as settings
+from .pool import InstrumentedPool
 
-print(settings().db_url)
-engine = create_async_engine(settings().db_url, echo=True)
+_settings = settings()
 
 
-async def create_db_tables():
-    async with engine.begin() as connection:
-        from .models import User, Publication  # noqa
+def _create_engine(url: str):
+    return create_async_engine(
+        url,
+        echo=_settings.DB_ECHO,
+        poolclass=InstrumentedPool,
+        pool_size=_settings.DB_POOL_SIZE,
+        max_overflow=_settings.DB_MAX_OVERFLOW,
+        pool_timeout=_settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=_settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=_settings.DB_POOL_PRE_PING,
+    )
 
-        await connection.run_sync(SQLModel.metadata.create_all)
+
+engine = _create_engine(_settings.db_url)
+# None unless REPLICA_POSTGRES_HOST is set; see app.database.replica.
+replica_engine = (
+    _create_engine(_settings.replica_db_url) if _settings.replica_db_url else None
+)
+
+
+ALEMBIC_CONFIG = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+async def check_schema_version():
+    """Refuse to start unless the database is at the latest migration.
+
+    Only the alembic_version row is read, so startup does not depend on the
+    size of the schema. Migrations are applied with `alembic upgrade head`.
+    """
+    async with engine.connect() as connection:
+        current = await connection.run_sync(
+            lambda sync_connection: set(
+                MigrationContext.configure(sync_connection).get_current_heads()
+            )
+        )
+    expected = set(ScriptDirectory.from_config(Config(ALEMBIC_CONFIG)).get_heads())
+    if current != expected:
+        raise RuntimeError(
+            f"Database schema is at {sorted(current) or 'no revision'}, expected "
+            f"{sorted(expected)}. Run `alembic upgrade head` before starting."
+        )
 
 
 async_session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+replica_session = (
+    sessionmaker(bind=replica_engine, class_=AsyncSession, expire_on_commit=False)
+    if replica_engine is not None
+    else None
+)
 
 
 async def get_session():
@@ -1,25 +1,92 @@
+import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
+from fastapi.responses import PlainTextResponse
+from app.api.dependencies import require_internal_token
 from app.api.router import master_router
-from app.database.session import create_db_tables
+from app.core.load_shedding import LoadSheddingMiddleware, load_monitor
+from app.core.metrics import MetricsMiddleware, instrument_engine, metrics_registry
+from app.core.proxy_headers import ProxyHeadersMiddleware
+from app.core.revocations import revoked_tokens
+from app.database.config import DatabaseSettings, SecuritySettings
+from app.database.replica import replica_router
+from app.database.session import check_schema_version, engine, replica_engine
+from app.services.counters import flush_counters, run_counter_flusher
+from app.services.trending import run_trending_maintenance
+from app.services.views import run_view_flusher, view_buffer
 from scalar_fastapi import get_scalar_api_reference
 
 
 @asynccontextmanager
 async def lifespan_handler(app: FastAPI):
-    await create_db_tables()
+    await check_schema_version()
+    settings = DatabaseSettings()
+    counter_flusher = asyncio.create_task(
+        run_counter_flusher(settings.COUNTER_FLUSH_INTERVAL_SECONDS)
+    )
+    view_flusher = asyncio.create_task(
+        run_view_flusher(settings.VIEW_FLUSH_INTERVAL_SECONDS)
+    )
+    trending_maintenance = asyncio.create_task(
+        run_trending_maintenance(settings.TRENDING_MAINTENANCE_INTERVAL_SECONDS)
+    )
+    revocations_listener = asyncio.create_task(revoked_tokens.run())
+    load_monitor_task = asyncio.create_task(load_monitor.run())
+    replica_monitor = (
+        asyncio.create_task(replica_router.run()) if replica_router.enabled else None
+    )
     yield
+    if replica_monitor is not None:
+        replica_monitor.cancel()
+    load_monitor_task.cancel()
+    trending_maintenance.cancel()
+    revocations_listener.cancel()
+    view_flusher.cancel()
+    counter_flusher.cancel()
+    await view_buffer.flush()
+    await flush_counters()
 
 
-app = FastAPI(lifespan=lifespan_handler, 
-              contact={
-            "name": "Andrei Silva",
-            "url": "https://github.com/andreisilva1",
-            "email": "andrei.pydev@gmail.com"}
-        )
+app = FastAPI(
+    lifespan=lifespan_handler,
+    contact={
+        "name": "Andrei Silva",
+        "url": "https://github.com/andreisilva1",
+        "email": "andrei.pydev@gmail.com",
+    },
+)
+app.add_middleware(
+    LoadSheddingMiddleware,
+    monitor=load_monitor,
+    max_lag=SecuritySettings().MAX_EVENT_LOOP_LAG_SECONDS,
+    max_concurrency=SecuritySettings().MAX_CONCURRENT_REQUESTS,
+    exempt_prefixes=("/internal", "/metrics"),
+)
+# Added last so it wraps load shedding and also counts the requests it rejects.
+app.add_middleware(
+    MetricsMiddleware,
+    registry=metrics_registry,
+    slow_request_seconds=DatabaseSettings().SLOW_REQUEST_LOG_SECONDS,
+)
+# Outermost, so rate limits, view counts and logs all see the real client.
+app.add_middleware(ProxyHeadersMiddleware, trusted=SecuritySettings().TRUSTED_PROXIES)
+instrument_engine(engine)
+if replica_engine is not None:
+    instrument_engine(replica_engine)
 app.include_router(master_router)
 
 
 @app.get("/", include_in_schema=False)
 def get_scalar_docs():
     return get_scalar_api_reference(openapi_url=app.openapi_url, title="MiniBlog API")
+
+
+@app.get(
+    "/metrics",
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_token)],
+)
+async def get_metrics():
+    return PlainTextResponse(
+        metrics_registry.render(), media_type="text/plain; version=0.0.4"
+    )
@@ -1,15 +1,133 @@
+import json
+from dataclasses import dataclass, field
+from uuid import UUID
 from fastapi import HTTPException, status
+from redis.exceptions import RedisError
+from sqlalchemy import delete, exists
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlmodel import select
-from app.database.models import Blocked_Tags, Tags, User
+from app.api.schemas.user import Principal
+from app.database.config import DatabaseSettings as settings
+from app.database.models import Blocked_Tags, Blocked_Users, Tags, User
+from app.database.redis import redis_client
+
+# always present in a cached blocked-users set, so an empty block list is
+# still distinguishable from a cache miss
+_LOADED_MARKER = "-"
+
+
+def blocked_tags_key(user_id: UUID) -> str:
+    return f"blocked_tags:{user_id}"
+
+
+def blocked_users_key(user_id: UUID) -> str:
+    return f"blocked_users:{user_id}"
+
+
+@dataclass(frozen=True)
+class FeedFilters:
+    """What the caller asked to hide from their feeds."""
+
+    blocked_tags: frozenset[Tags] = field(default_factory=frozenset)
+    # set only when the caller blocks at least one user
+    blocker_id: UUID | None = None
 
 
 class BlockService:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def block_tag(self, tag_name: Tags, current_user: User):
+    async def get_blocked_tags(self, user_id: UUID) -> frozenset[Tags]:
+        """The user's blocked tags, cached in Redis until the next toggle."""
+        key = blocked_tags_key(user_id)
+        try:
+            cached = await redis_client.get(key)
+        except RedisError:
+            cached = None
+        if cached is not None:
+            return frozenset(Tags(tag) for tag in json.loads(cached))
+
+        result = await self.session.execute(
+            select(Blocked_Tags.tag).where(Blocked_Tags.user_id == user_id)
+        )
+        blocked_tags = frozenset(result.scalars().all())
+        try:
+            await redis_client.set(
+                key,
+                json.dumps(sorted(tag.value for tag in blocked_tags)),
+                ex=settings().BLOCKED_TAGS_CACHE_TTL_SECONDS,
+            )
+        except RedisError:
+            pass
+        return blocked_tags
+
+    async def forget_blocked_tags(self, user_id: UUID):
+        try:
+            await redis_client.delete(blocked_tags_key(user_id))
+        except RedisError:
+            pass
+
+    async def _cache_blocked_users(self, user_id: UUID) -> list[str]:
+        result = await self.session.execute(
+            select(Blocked_Users.blocked_user_id).where(
+                Blocked_Users.user_id == user_id
+            )
+        )
+        blocked_user_ids = [str(id) for id in result.scalars().all()]
+        key = blocked_users_key(user_id)
+        try:
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.delete(key)
+                pipe.sadd(key, _LOADED_MARKER, *blocked_user_ids)
+                pipe.expire(key, settings().BLOCKED_USERS_CACHE_TTL_SECONDS)
+                await pipe.execute()
+        except RedisError:
+            pass
+        return blocked_user_ids
+
+    async def blocks_anyone(self, user_id: UUID) -> bool:
+        try:
+            cached_size = await redis_client.scard(blocked_users_key(user_id))
+        except RedisError:
+            return bool(
+                await self.session.scalar(
+                    select(exists().where(Blocked_Users.user_id == user_id))
+                )
+            )
+        if cached_size:
+            return cached_size > 1
+        return bool(await self._cache_blocked_users(user_id))
+
+    async def is_user_blocked(self, user_id: UUID, other_user_id: UUID) -> bool:
+        """O(1) membership check against the cached blocked-users set."""
+        key = blocked_users_key(user_id)
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.exists(key)
+                pipe.sismember(key, str(other_user_id))
+                cached, blocked = await pipe.execute()
+            if cached:
+                return bool(blocked)
+        except RedisError:
+            pass
+        return (
+            await self.session.get(Blocked_Users, (user_id, other_user_id)) is not None
+        )
+
+    async def forget_blocked_users(self, user_id: UUID):
+        try:
+            await redis_client.delete(blocked_users_key(user_id))
+        except RedisError:
+            pass
+
+    async def get_feed_filters(self, user_id: UUID) -> FeedFilters:
+        return FeedFilters(
+            blocked_tags=await self.get_blocked_tags(user_id),
+            blocker_id=user_id if await self.blocks_anyone(user_id) else None,
+        )
+
+    async def block_tag(self, tag_name: Tags, current_user: Principal):
         if tag_name not in Tags:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -32,6 +150,7 @@ class BlockService:
             if connection:
                 await self.session.delete(connection)
                 await self.session.commit()
+                await self.forget_blocked_tags(current_user.id)
                 return {
                     "detail": f"The {tag_name} is now unblocked and you will see publications with this tag now."
                 }
@@ -44,6 +163,47 @@ class BlockService:
         new_link = Blocked_Tags(user_id=current_user.id, tag=tag_name)
         self.session.add(new_link)
         await self.session.commit()
+        await self.forget_blocked_tags(current_user.id)
         return {
             "detail": f"The {tag_name} is now blocked. If you want to unblock, just select the tag and send the request again! :)"
         }
+
+    async def block_user(self, nickname: str, current_user: Principal):
+        result = await self.session.execute(
+            select(User.id).where(User.nickname == nickname)
+        )
+        blocked_user_id = result.scalar_one_or_none()
+        if blocked_user_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No user has been found with this nickname.",
+            )
+        if blocked_user_id == current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You can't block yourself.",
+            )
+
+        removed = await self.session.execute(
+            delete(Blocked_Users)
+            .where(
+                Blocked_Users.user_id == current_user.id,
+                Blocked_Users.blocked_user_id == blocked_user_id,
+            )
+            .returning(Blocked_Users.blocked_user_id)
+        )
+        if removed.first():
+            await self.session.commit()
+            await self.forget_blocked_users(current_user.id)
+            return {
+                "detail": f"{nickname} is now unblocked and you will see their publications now."
+            }
+
+        self.session.add(
+            Blocked_Users(user_id=current_user.id, blocked_user_id=blocked_user_id)
+        )
+        await self.session.commit()
+        await self.forget_blocked_users(current_user.id)
+        return {
+            "detail": f"{nickname} is now blocked. If you want to unblock, just send the request again! :)"
+        }
@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta
+from typing import List, Sequence
+import humanize
+import orjson
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.schemas.publication import ReadPublication, preview_description
+from app.database.models import Publication, User
+from app.services.counters import COUNTERS, get_pending_counters
+from app.services.views import view_buffer
+
+
+async def get_creator_names(publications: Sequence[Publication], session: AsyncSession):
+    """Nicknames of every creator on the page.
+
+    Creators already loaded by the query's loading profile are used as-is, the
+    rest are resolved in a single IN query.
+    """
+    creator_names = {}
+    for publication in publications:
+        if "creator" not in inspect(publication).unloaded:
+            creator_names[publication.creator_id] = publication.creator.nickname
+    missing_ids = {
+        publication.creator_id for publication in publications
+    } - creator_names.keys()
+    if missing_ids:
+        result = await session.execute(
+            select(User.id, User.nickname).where(User.id.in_(missing_ids))
+        )
+        creator_names.update(result.all())
+    return creator_names
+
+
+def build_readable_publication(
+    publication: Publication,
+    creator_name: str,
+    now: datetime,
+    pending_counters: dict[tuple[int, str], int],
+) -> ReadPublication:
+    data = publication.model_dump(exclude=["published_at", "creator", "last_update_at"])
+    for counter in COUNTERS:
+        data[counter] += pending_counters.get((publication.id, counter), 0)
+    data["views"] += view_buffer.pending_views(publication.id)
+    return ReadPublication(
+        **data,
+        creator_name=creator_name,
+        published_at=humanize.naturaltime(now - publication.published_at),
+        last_update_at=humanize.naturaltime(publication.last_update_at),
+    )
+
+
+async def convert_publications_to_readable_publications(
+    publications: Sequence[Publication], session: AsyncSession
+) -> List[ReadPublication]:
+    creator_names = await get_creator_names(publications, session)
+    pending_counters = await get_pending_counters(
+        publication.id for publication in publications
+    )
+    now = datetime.now()
+    return [
+        build_readable_publication(
+            publication, creator_names[publication.creator_id], now, pending_counters
+        )
+        for publication in publications
+    ]
+
+
+class NaturalTimes:
+    """humanize.naturaltime relative to one `now`, memoized for a request.
+
+    naturaltime only looks at whole days once a delta reaches a day, and at
+    whole seconds below that, so rows falling in the same bucket share one
+    call. Future dates are rare and rendered without the cache.
+    """
+
+    def __init__(self, now: datetime):
+        self.now = now
+        self._rendered: dict = {}
+
+    def since(self, moment: datetime | None) -> str:
+        if moment is None:
+            return humanize.naturaltime(None)
+        delta = self.now - moment
+        if delta < timedelta(0):
+            return humanize.naturaltime(delta)
+        key = delta.days or -delta.seconds
+        rendered = self._rendered.get(key)
+        if rendered is None:
+            rendered = self._rendered[key] = humanize.naturaltime(delta)
+        return rendered
+
+
+async def render_publication_page(
+    publications: Sequence[Publication],
+    session: AsyncSession,
+    next_cursor: str | None,
+) -> bytes:
+    """Serialize a PublicationPage straight to JSON bytes.
+
+    Produces the same document as building ReadPublication models and letting
+    FastAPI validate and encode them, but reads the row attributes into plain
+    dicts and hands them to orjson, so no model is built or validated per row.
+    """
+    creator_names = await get_creator_names(publications, session)
+    pending_counters = await get_pending_counters(
+        publication.id for publication in publications
+    )
+    return encode_publication_page(
+        publications, creator_names, pending_counters, next_cursor, datetime.now()
+    )
+
+
+def encode_publication_page(
+    publications: Sequence[Publication],
+    creator_names: dict,
+    pending_counters: dict[tuple[int, str], int],
+    next_cursor: str | None,
+    now: datetime,
+) -> bytes:
+    times = NaturalTimes(now)
+    items = []
+    for publication in publications:
+        id = publication.id
+        items.append(
+            {
+                "title": publication.title,
+                "description": preview_description(publication.description),
+                "id": id,
+                "creator_name": creator_names[publication.creator_id],
+                "views": publication.views
+                + pending_counters.get((id, "views"), 0)
+                + view_buffer.pending_views(id),
+                "likes": publication.likes + pending_counters.get((id, "likes"), 0),
+                "dislikes": publication.dislikes
+                + pending_counters.get((id, "dislikes"), 0),
+                "published_at": times.since(publication.published_at),
+                "last_update_at": times.since(publication.last_update_at),
+                "unique_viewers": None,
+            }
+        )
+    return orjson.dumps({"items": items, "next_cursor": next_cursor})
+
+
+async def convert_publication_to_readable_publication(
+    publication: Publication, session: AsyncSession
+) -> ReadPublication:
+    return (
+        await convert_publications_to_readable_publications([publication], session)
+    )[0]
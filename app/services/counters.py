@@ -0,0 +1,294 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable
+from uuid import uuid4
+from redis.exceptions import LockError, RedisError
+from sqlalchemy import Integer, column, delete, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import CounterDelta, CounterFlush, Publication, Tags
+from app.database.redis import redis_client
+from app.database.session import async_session
+from app.services.trending import record_activity
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ("likes", "dislikes", "views")
+
+_PENDING_KEY = "publication_counters:pending"
+_FLUSHING_KEY = "publication_counters:flushing"
+_LOCK_KEY = "publication_counters:lock"
+_BATCH_FIELD = "batch_id"
+_FLUSH_CHUNK_SIZE = 1000
+_FLUSH_HISTORY = timedelta(days=1)
+_RELAYED_KEY_PREFIX = "publication_counters:relayed:"
+# Only has to outlive the outbox row, which the next flush deletes.
+_RELAYED_TTL_SECONDS = 86400
+
+# Adds one outbox row to the pending hash at most once. The marker is set in
+# the same script as the increments, so a retry after a lost reply (or a relay
+# racing the flusher's) finds it and adds nothing.
+_RELAY_SCRIPT = """
+if redis.call('SET', KEYS[2], 1, 'NX', 'EX', ARGV[1]) then
+    for i = 2, #ARGV, 2 do
+        redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+    end
+end
+"""
+_relay = redis_client.register_script(_RELAY_SCRIPT)
+
+# Id of the last batch this worker knows to be committed. A committed batch
+# never becomes pending again, so remembering it saves the lookup until its
+# flushing hash is gone.
+_last_applied_batch: str | None = None
+
+
+def stage_counters(
+    session: AsyncSession, publication_id: int, deltas: dict[str, int]
+) -> CounterDelta | None:
+    """Add counter deltas to the caller's transaction, as an outbox row.
+
+    The deltas commit or roll back with the change that caused them. Once
+    committed, hand the row to `relay_counters`; rows it could not relay are
+    relayed by the next flush.
+    """
+    deltas = {counter: delta for counter, delta in deltas.items() if delta}
+    if not deltas:
+        return None
+    outbox = CounterDelta(publication_id=publication_id, **deltas)
+    session.add(outbox)
+    return outbox
+
+
+async def _relay_rows(rows: Iterable[CounterDelta]):
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for row in rows:
+            args = [_RELAYED_TTL_SECONDS]
+            for counter in COUNTERS:
+                if delta := getattr(row, counter):
+                    args.extend((f"{row.publication_id}:{counter}", delta))
+            await _relay(
+                keys=[_PENDING_KEY, f"{_RELAYED_KEY_PREFIX}{row.id}"],
+                args=args,
+                client=pipe,
+            )
+        await pipe.execute()
+
+
+async def relay_counters(rows: list[CounterDelta]):
+    """Move committed outbox rows into the Redis buffer, so reads see them."""
+    try:
+        await _relay_rows(rows)
+    except RedisError:
+        logger.warning("Redis unavailable, counters are relayed on the next flush.")
+
+
+async def commit_counters(deltas: dict[int, dict[str, int]]):
+    """Commit the deltas of several publications to the outbox, then relay them.
+
+    For deltas that belong to no transaction of their own, such as views.
+    Publications deleted in the meantime are skipped (the key share lock keeps
+    the rest from being deleted before the commit). Raises when the commit
+    fails, in which case nothing was staged.
+    """
+    async with async_session() as session:
+        existing = await session.scalars(
+            select(Publication.id)
+            .where(Publication.id.in_(list(deltas)))
+            .with_for_update(key_share=True)
+        )
+        rows = [
+            outbox
+            for id in existing
+            if (outbox := stage_counters(session, id, deltas[id])) is not None
+        ]
+        await session.commit()
+    await relay_counters(rows)
+
+
+async def _relay_outbox() -> int:
+    """Relay one chunk of outbox rows and delete them.
+
+    Rows already relayed by their request are skipped by the script, and a
+    crash between the relay and the DELETE only relays them again, so every
+    row reaches the buffer exactly once.
+    """
+    async with async_session() as session:
+        rows = (
+            await session.scalars(
+                select(CounterDelta)
+                .order_by(CounterDelta.id)
+                .limit(_FLUSH_CHUNK_SIZE)
+                .with_for_update(skip_locked=True)
+            )
+        ).all()
+        if not rows:
+            return 0
+        await _relay_rows(rows)
+        await session.execute(
+            delete(CounterDelta).where(CounterDelta.id.in_([row.id for row in rows]))
+        )
+        await session.commit()
+    return len(rows)
+
+
+async def get_pending_counters(
+    publication_ids: Iterable[int],
+) -> dict[tuple[int, str], int]:
+    """Deltas not yet flushed to Postgres, keyed by (publication id, counter).
+
+    The flushing batch is left out once its commit is recorded in
+    counter_flushes, even while its hash is still in Redis: the columns
+    already include it.
+    """
+    keys = [(id, counter) for id in publication_ids for counter in COUNTERS]
+    if not keys:
+        return {}
+    fields = [f"{id}:{counter}" for id, counter in keys]
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.hmget(_PENDING_KEY, fields)
+            pipe.hmget(_FLUSHING_KEY, [_BATCH_FIELD, *fields])
+            pending, (batch_id, *flushing) = await pipe.execute()
+    except RedisError:
+        return {}
+    if batch_id is not None and await _is_applied(batch_id):
+        flushing = [None] * len(fields)
+
+    result = {}
+    for key, buffered, in_flight in zip(keys, pending, flushing):
+        delta = int(buffered or 0) + int(in_flight or 0)
+        if delta:
+            result[key] = delta
+    return result
+
+
+async def _is_applied(batch_id: str) -> bool:
+    global _last_applied_batch
+    if batch_id == _last_applied_batch:
+        return True
+    async with async_session() as session:
+        if await session.get(CounterFlush, batch_id) is None:
+            return False
+    _last_applied_batch = batch_id
+    return True
+
+
+async def _claim_batch() -> dict[str, str]:
+    """Move the pending deltas into the flushing hash, tagged with a batch id.
+
+    A batch left behind by a crashed flusher is returned as-is, so it is
+    retried with its original id instead of being merged into a new one.
+    """
+    if not await redis_client.exists(_FLUSHING_KEY):
+        if not await redis_client.exists(_PENDING_KEY):
+            return {}
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.rename(_PENDING_KEY, _FLUSHING_KEY)
+            pipe.hset(_FLUSHING_KEY, _BATCH_FIELD, uuid4().hex)
+            await pipe.execute()
+    return await redis_client.hgetall(_FLUSHING_KEY)
+
+
+def _to_rows(deltas: dict[int, dict[str, int]]) -> list[tuple[int, ...]]:
+    return [
+        (id, *(counters.get(counter, 0) for counter in COUNTERS))
+        for id, counters in deltas.items()
+    ]
+
+
+async def _apply_batch(
+    session: AsyncSession, rows: list[tuple[int, ...]]
+) -> dict[int, Tags | None]:
+    """Apply the rows and return the tag of every publication that was updated."""
+    tags = {}
+    for start in range(0, len(rows), _FLUSH_CHUNK_SIZE):
+        deltas = values(
+            column("id", Integer),
+            *(column(counter, Integer) for counter in COUNTERS),
+            name="deltas",
+        ).data(rows[start : start + _FLUSH_CHUNK_SIZE])
+        updated = await session.execute(
+            update(Publication)
+            .where(Publication.id == deltas.c.id)
+            .values(
+                {
+                    counter: getattr(Publication, counter) + deltas.c[counter]
+                    for counter in COUNTERS
+                }
+            )
+            .returning(Publication.id, Publication.tag)
+            .execution_options(synchronize_session=False)
+        )
+        tags.update(updated.tuples().all())
+    return tags
+
+
+async def flush_counters() -> int:
+    """Apply the buffered deltas to `publications` in batched UPDATEs.
+
+    The batch id is recorded in `counter_flushes` in the same transaction as
+    the UPDATEs, and the Redis batch is only deleted after that commit. A crash
+    before the commit retries the batch, a crash after it finds the id already
+    recorded and just discards the batch, so deltas are applied exactly once.
+    Readers skip a recorded batch, so it is never counted twice meanwhile.
+    """
+    global _last_applied_batch
+    lock = redis_client.lock(_LOCK_KEY, timeout=60)
+    if not await lock.acquire(blocking=False):
+        return 0
+    try:
+        while await _relay_outbox() == _FLUSH_CHUNK_SIZE:
+            pass
+        batch = await _claim_batch()
+        if batch and await _is_applied(batch[_BATCH_FIELD]):
+            # committed by a flush that could not delete it afterwards
+            await redis_client.delete(_FLUSHING_KEY)
+            batch = await _claim_batch()
+        if not batch:
+            return 0
+        batch_id = batch.pop(_BATCH_FIELD)
+
+        aggregated: dict[int, dict[str, int]] = {}
+        for field, delta in batch.items():
+            id, counter = field.split(":")
+            aggregated.setdefault(int(id), {})[counter] = int(delta)
+        rows = _to_rows(aggregated)
+
+        tags = {}
+        async with async_session() as session:
+            if not await session.get(CounterFlush, batch_id):
+                tags = await _apply_batch(session, rows)
+                now = datetime.now()
+                session.add(CounterFlush(batch_id=batch_id, flushed_at=now))
+                await session.execute(
+                    delete(CounterFlush).where(
+                        CounterFlush.flushed_at < now - _FLUSH_HISTORY
+                    )
+                )
+                await session.commit()
+        _last_applied_batch = batch_id
+
+        try:
+            await redis_client.delete(_FLUSHING_KEY)
+        except RedisError:
+            logger.warning(
+                "Redis unavailable, the flushed batch is deleted by the next flush."
+            )
+        await record_activity(aggregated, tags)
+        return len(rows)
+    finally:
+        try:
+            await lock.release()
+        except LockError:
+            pass
+
+
+async def run_counter_flusher(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await flush_counters()
+        except Exception:
+            logger.exception("Failed to flush publication counters.")
@@ -0,0 +1,86 @@
+import csv
+import io
+from enum import Enum
+from typing import AsyncIterator
+from uuid import UUID
+import orjson
+from sqlalchemy import select
+
+from app.database.models import Publication
+from app.database.replica import replica_router
+from app.services.counters import COUNTERS, get_pending_counters
+from app.services.views import view_buffer
+
+EXPORT_CHUNK_SIZE = 500
+EXPORT_COLUMNS = (
+    "id",
+    "tag",
+    "title",
+    "description",
+    "views",
+    "likes",
+    "dislikes",
+    "published_at",
+    "last_update_at",
+)
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+def _serialize(row: dict) -> dict:
+    row["tag"] = row["tag"].value if row["tag"] else None
+    for field in ("published_at", "last_update_at"):
+        row[field] = row[field].isoformat() if row[field] else None
+    return row
+
+
+def _render(rows: list[dict], format: ExportFormat, header: bool) -> str:
+    if format == ExportFormat.ndjson:
+        return b"".join(orjson.dumps(row) + b"\n" for row in rows).decode()
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+async def export_publications(
+    creator_id: UUID, format: ExportFormat
+) -> AsyncIterator[str]:
+    """Stream every publication of a creator, oldest first.
+
+    Rows come from a server-side cursor EXPORT_CHUNK_SIZE at a time and each
+    chunk is written out before the next is fetched, so memory stays flat
+    whatever the number of posts. The session is owned by the generator since
+    it has to outlive the request handler.
+    """
+    query = (
+        select(*(getattr(Publication, column) for column in EXPORT_COLUMNS))
+        .where(Publication.creator_id == creator_id)
+        .order_by(Publication.published_at, Publication.id)
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    )
+    header = True
+    async with replica_router.session(creator_id) as session:
+        result = await session.stream(query)
+        async for partition in result.mappings().partitions():
+            rows = [_serialize(dict(row)) for row in partition]
+            pending_counters = await get_pending_counters(row["id"] for row in rows)
+            for row in rows:
+                for counter in COUNTERS:
+                    row[counter] += pending_counters.get((row["id"], counter), 0)
+                row["views"] += view_buffer.pending_views(row["id"])
+            yield _render(rows, format, header)
+            header = False
+    if header and format == ExportFormat.csv:
+        yield _render([], format, header)
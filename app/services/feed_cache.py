@@ -0,0 +1,127 @@
+import logging
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, Sequence
+from redis.exceptions import RedisError
+
+from app.database.config import DatabaseSettings as settings
+from app.database.models import Publication, Tags
+from app.database.redis import redis_client
+from app.services.blocks import FeedFilters
+
+logger = logging.getLogger(__name__)
+
+LATEST_FEED = "latest"
+
+feed_cache_stats: Counter[str] = Counter()
+
+
+def tag_feed(tag: Tags) -> str:
+    return f"tag:{tag.value}"
+
+
+def _page_key(feed: str, cursor: str | None, limit: int, filters: FeedFilters) -> str:
+    # callers blocking the same tags see the same page, so they share the entry
+    blocked = ",".join(sorted(tag.value for tag in filters.blocked_tags))
+    return f"feed_cache:page:{feed}:{blocked}:{cursor or ''}:{limit}"
+
+
+# when any publication was last created, edited or deleted
+_LAST_MODIFIED_KEY = "feed_cache:last_modified"
+
+
+def _heads_key(feed: str) -> str:
+    # first pages of a feed, the only ones a new publication can land on
+    return f"feed_cache:heads:{feed}"
+
+
+def _pages_of_key(publication_id: int) -> str:
+    return f"feed_cache:pages_of:{publication_id}"
+
+
+async def get_cached_page(
+    feed: str,
+    cursor: str | None,
+    limit: int,
+    filters: FeedFilters = FeedFilters(),
+) -> str | None:
+    """Serialized page for this feed position, or None on a miss.
+
+    A Redis failure is treated as a miss so the feed is served from Postgres.
+    Callers who block users get personal pages, which are never cached.
+    """
+    if filters.blocker_id:
+        feed_cache_stats["bypasses"] += 1
+        return None
+    try:
+        page = await redis_client.get(_page_key(feed, cursor, limit, filters))
+    except RedisError:
+        feed_cache_stats["errors"] += 1
+        return None
+    feed_cache_stats["hits" if page is not None else "misses"] += 1
+    return page
+
+
+async def cache_page(
+    feed: str,
+    cursor: str | None,
+    limit: int,
+    page: bytes,
+    publications: Sequence[Publication],
+    filters: FeedFilters = FeedFilters(),
+):
+    if filters.blocker_id:
+        return
+    key = _page_key(feed, cursor, limit, filters)
+    ttl = settings().FEED_CACHE_TTL_SECONDS
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.set(key, page, ex=ttl)
+            if cursor is None:
+                pipe.sadd(_heads_key(feed), key)
+                pipe.expire(_heads_key(feed), ttl)
+            for publication in publications:
+                pipe.sadd(_pages_of_key(publication.id), key)
+                pipe.expire(_pages_of_key(publication.id), ttl)
+            await pipe.execute()
+    except RedisError:
+        feed_cache_stats["errors"] += 1
+
+
+async def _delete_members(index_keys: list[str]):
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for index_key in index_keys:
+                pipe.smembers(index_key)
+            members = await pipe.execute()
+        stale_keys = set().union(*members)
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.delete(*stale_keys, *index_keys)
+            pipe.set(_LAST_MODIFIED_KEY, time.time())
+            await pipe.execute()
+    except RedisError:
+        logger.warning("Redis unavailable, feed cache entries expire on their TTL.")
+
+
+async def get_feeds_last_modified() -> datetime | None:
+    """Collection-level version stamp shared by every publication feed."""
+    try:
+        stamp = await redis_client.get(_LAST_MODIFIED_KEY)
+    except RedisError:
+        return None
+    return datetime.fromtimestamp(float(stamp)) if stamp else None
+
+
+async def invalidate_feed_heads(feeds: Iterable[str]):
+    """Drop the first pages of the feeds a new publication shows up in.
+
+    Later pages are addressed by keyset cursors that are older than any new
+    publication, so their contents cannot change.
+    """
+    await _delete_members([_heads_key(feed) for feed in feeds])
+
+
+async def invalidate_publication_pages(publication_id: int):
+    """Drop every cached page that contains this publication."""
+    await _delete_members([_pages_of_key(publication_id)])
@@ -0,0 +1,110 @@
+import logging
+from datetime import datetime
+from typing import AsyncIterable, AsyncIterator
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.schemas.publication import ImportPublication, ImportReport, ImportRowError
+from app.api.schemas.user import Principal
+from app.database.config import DatabaseSettings as settings
+from app.database.models import Publication
+from app.services.feed_cache import LATEST_FEED, invalidate_feed_heads, tag_feed
+
+logger = logging.getLogger(__name__)
+
+MAX_LINE_BYTES = 64 * 1024
+# Only the first errors are echoed back; the rest are counted in `failed`.
+MAX_REPORTED_ERRORS = 100
+
+
+async def _ndjson_lines(
+    chunks: AsyncIterable[bytes],
+) -> AsyncIterator[tuple[int, bytes | None]]:
+    """Yield (line number, line) from a chunked body, one line at a time.
+
+    A line longer than MAX_LINE_BYTES is yielded as None and its remaining
+    bytes are dropped as they arrive, so memory never holds more than one
+    line plus one chunk.
+    """
+    buffer = b""
+    number = 0
+    oversized = False
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            number += 1
+            yield number, None if oversized or len(line) > MAX_LINE_BYTES else line
+            oversized = False
+        if len(buffer) > MAX_LINE_BYTES:
+            buffer, oversized = b"", True
+    if buffer or oversized:
+        yield number + 1, None if oversized else buffer
+
+
+async def import_publications(
+    session: AsyncSession, chunks: AsyncIterable[bytes], current_user: Principal
+) -> ImportReport:
+    """Create publications from an NDJSON stream, one JSON object per line.
+
+    Rows are validated as they arrive and inserted with one multi-row INSERT
+    per IMPORT_BATCH_SIZE valid rows, each batch in its own transaction.
+    Invalid rows are reported by line number and never stop the import.
+    """
+    batch_size = settings().IMPORT_BATCH_SIZE
+    report = ImportReport()
+    batch: list[dict] = []
+    batch_lines: list[int] = []
+    tags = set()
+
+    def fail(line: int, detail: str):
+        report.failed += 1
+        if len(report.errors) < MAX_REPORTED_ERRORS:
+            report.errors.append(ImportRowError(line=line, detail=detail))
+
+    async def insert_batch():
+        try:
+            await session.execute(insert(Publication), batch)
+            await session.commit()
+        except SQLAlchemyError:
+            logger.exception("Failed to insert an import batch.")
+            await session.rollback()
+            for line in batch_lines:
+                fail(line, "The row could not be stored.")
+        else:
+            report.imported += len(batch)
+            tags.update(row["tag"] for row in batch)
+        batch.clear()
+        batch_lines.clear()
+
+    async for line_number, line in _ndjson_lines(chunks):
+        if line is None:
+            fail(line_number, f"Lines are limited to {MAX_LINE_BYTES} bytes.")
+            continue
+        if not line.strip():
+            continue
+        try:
+            publication = ImportPublication.model_validate_json(line)
+        except ValidationError as error:
+            fail(line_number, "; ".join(e["msg"] for e in error.errors()))
+            continue
+        batch.append(
+            {
+                **publication.model_dump(),
+                "creator_id": current_user.id,
+                "published_at": datetime.now(),
+            }
+        )
+        batch_lines.append(line_number)
+        if len(batch) >= batch_size:
+            await insert_batch()
+    if batch:
+        await insert_batch()
+
+    if report.imported:
+        await invalidate_feed_heads(
+            [LATEST_FEED, *(tag_feed(tag) for tag in tags if tag)]
+        )
+    return report
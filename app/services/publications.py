@@ -1,61 +1,151 @@
 from datetime import datetime, timedelta
 from fastapi import HTTPException, status
-import humanize
-from sqlalchemy import desc, select
+from redis.exceptions import RedisError
+from sqlalchemy import desc, exists, func, or_, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.conditional import Validators, entity_tag
+from app.api.schemas.user import Principal
 from app.api.schemas.publication import (
     CreatePublication,
     DateSearch,
     ReadPublication,
     UpdatePublication,
 )
+from app.services.blocks import BlockService, FeedFilters
+from app.services.conversion import (
+    NaturalTimes,
+    convert_publication_to_readable_publication,
+)
+from app.services.counters import COUNTERS, get_pending_counters
+from app.services.feed_cache import (
+    LATEST_FEED,
+    invalidate_feed_heads,
+    invalidate_publication_pages,
+    tag_feed,
+)
+from app.services.reactions import Reaction, ReactionOutcome, toggle_reaction
+from app.services.trending import (
+    forget_publication,
+    get_trending_ids,
+    record_published,
+)
+from app.services.views import count_unique_viewers, view_buffer
+from app.database.loading import PublicationLoad, publication_loading
 from app.database.models import (
+    Blocked_Users,
     DislikedPublicationAndUsers,
     LikedPublicationAndUsers,
+    SEARCH_CONFIG,
     Publication,
     Tags,
     User,
 )
+from app.utils import (
+    decode_cursor,
+    decode_rank_cursor,
+    decode_search_cursor,
+    encode_cursor,
+    encode_rank_cursor,
+    encode_search_cursor,
+)
+
+REACTION_MESSAGES = {
+    Reaction.like: {
+        ReactionOutcome.added: "You liked this post!",
+        ReactionOutcome.removed: "You remove your like from this post.",
+        ReactionOutcome.switched: "Your dislike changed to a like! :)",
+    },
+    Reaction.dislike: {
+        ReactionOutcome.added: "You disliked this post!",
+        ReactionOutcome.removed: "You remove your dislike from this post.",
+        ReactionOutcome.switched: "Your like changed to a dislike! :(",
+    },
+}
 
 
 class PublicationService:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def get(self, id: int):
-        publication = await self.session.get(Publication, id)
+    async def get(self, id: int, load: PublicationLoad = PublicationLoad.summary):
+        publication = await self.session.get(
+            Publication, id, options=publication_loading(load)
+        )
         return publication
 
     async def add(
-        self, create_publication: CreatePublication, current_user: User
+        self, create_publication: CreatePublication, current_user: Principal
     ) -> Publication:
         publication = Publication(
             **create_publication.model_dump(),
             creator_id=current_user.id,
             published_at=datetime.now(),
-            creator=current_user,
         )
         self.session.add(publication)
         await self.session.commit()
         await self.session.refresh(publication)
+        await invalidate_feed_heads([LATEST_FEED, tag_feed(publication.tag)])
+        await record_published(publication.id, publication.tag)
         return publication
 
-    async def get_my_publications(self, current_user: User):
-        query = await self.session.execute(
-            select(Publication).where(Publication.creator_id == current_user.id)
+    async def paginate(
+        self,
+        query,
+        cursor: str | None,
+        limit: int,
+        filters: FeedFilters = FeedFilters(),
+        load: PublicationLoad = PublicationLoad.summary,
+    ):
+        """Keyset pagination on (published_at, id), newest first.
+
+        Publications with one of the caller's blocked tags, or from a creator
+        they blocked (an anti-join on the blocked_users primary key), are
+        filtered out in the query itself. Returns the page of publications and
+        the cursor of the next page (None when there is nothing left).
+        """
+        query = apply_feed_filters(query, filters)
+        if cursor:
+            position = decode_cursor(cursor)
+            if position is None:
+                invalid_cursor()
+            query = query.where(
+                tuple_(Publication.published_at, Publication.id) < tuple_(*position)
+            )
+        query = (
+            query.options(*publication_loading(load))
+            .order_by(desc(Publication.published_at), desc(Publication.id))
+            .limit(limit + 1)
         )
-        publications = query.scalars().all()
-        return publications
-
-    async def get_latest_publications(self):
-        latest_publications = await self.session.execute(
-            select(Publication).order_by(desc(Publication.published_at)).limit(1)
+        result = await self.session.execute(query)
+        publications = result.scalars().all()
+
+        next_cursor = None
+        if len(publications) > limit:
+            publications = publications[:limit]
+            last = publications[-1]
+            next_cursor = encode_cursor(last.published_at, last.id)
+        return publications, next_cursor
+
+    async def get_my_publications(
+        self, current_user: Principal, cursor: str | None = None, limit: int = 20
+    ):
+        return await self.paginate(
+            select(Publication).where(Publication.creator_id == current_user.id),
+            cursor,
+            limit,
         )
-        return latest_publications.scalars().all()
+
+    async def get_latest_publications(
+        self,
+        cursor: str | None = None,
+        limit: int = 20,
+        filters: FeedFilters = FeedFilters(),
+    ):
+        return await self.paginate(select(Publication), cursor, limit, filters)
 
     async def update(
-        self, id: int, current_user: User, publication_update: UpdatePublication
+        self, id: int, current_user: Principal, publication_update: UpdatePublication
     ):
         publication = await self.get(id)
 
@@ -73,13 +163,13 @@ class PublicationService:
             setattr(publication, key, value)
 
         publication.last_update_at = datetime.now()
-        print(publication)
         self.session.add(publication)
         await self.session.commit()
         await self.session.refresh(publication)
+        await invalidate_publication_pages(publication.id)
         return await self.get(publication.id)
 
-    async def delete(self, id: int, current_user: User):
+    async def delete(self, id: int, current_user: Principal):
         publication = await self.get(id)
         if not publication or not current_user:
             raise HTTPException(
@@ -89,6 +179,8 @@ class PublicationService:
         if publication.creator_id == current_user.id:
             await self.session.delete(await self.get(publication.id))
             await self.session.commit()
+            await invalidate_publication_pages(publication.id)
+            await forget_publication(publication.id, publication.tag)
             return {
                 "detail": f"The publication with the id #{publication.id} has been deleted."
             }
@@ -98,214 +190,331 @@ class PublicationService:
             detail="You cannot delete a post that hasn't been created by you.",
         )
 
-    async def get_by_id(self, id: int):
-        publication = await self.session.get(Publication, id)
+    async def get_by_id(
+        self, id: int, viewer: str | None = None, filters: FeedFilters = FeedFilters()
+    ):
+        publication = await self.get(id, PublicationLoad.with_creator)
         if not publication:
             publication_id_not_found()
-        creator = await self.session.get(entity=User, ident=publication.creator_id)
-        return ReadPublication(
-            **publication.model_dump(
-                exclude=["published_at", "creator", "last_update_at"]
-            ),
-            creator_name=creator.nickname,
-            published_at=humanize.naturaltime(
-                datetime.now() - publication.published_at
-            ),
-            last_update_at=humanize.naturaltime(publication.last_update_at),
+        if filters.blocker_id and await BlockService(self.session).is_user_blocked(
+            filters.blocker_id, publication.creator_id
+        ):
+            publication_id_not_found()
+        view_buffer.record(publication.id, viewer)
+        readable_publication = await convert_publication_to_readable_publication(
+            publication, self.session
+        )
+        readable_publication.unique_viewers = await count_unique_viewers(publication.id)
+        return readable_publication, publication_validators(
+            readable_publication,
+            publication.last_update_at or publication.published_at,
         )
 
-    async def get_by_tag(self, tag: Tags):
-        query = await self.session.execute(
-            select(Publication).where(Publication.tag == tag)
+    async def get_validators(
+        self, id: int, filters: FeedFilters = FeedFilters()
+    ) -> Validators | None:
+        """ETag and Last-Modified of what get_by_id would return right now.
+
+        Reads the version columns only (no title or description) and records no
+        view, so a revalidation that ends in a 304 is cheap and is not counted
+        as a read. Returns None when get_by_id would answer 404.
+        """
+        row = (
+            await self.session.execute(
+                select(
+                    Publication.id,
+                    Publication.creator_id,
+                    Publication.views,
+                    Publication.likes,
+                    Publication.dislikes,
+                    Publication.published_at,
+                    Publication.last_update_at,
+                    User.nickname,
+                )
+                .join(User, User.id == Publication.creator_id)
+                .where(Publication.id == id)
+            )
+        ).one_or_none()
+        if row is None:
+            return None
+        if filters.blocker_id and await BlockService(self.session).is_user_blocked(
+            filters.blocker_id, row.creator_id
+        ):
+            return None
+
+        pending_counters = await get_pending_counters([id])
+        counters = {
+            counter: getattr(row, counter) + pending_counters.get((id, counter), 0)
+            for counter in COUNTERS
+        }
+        counters["views"] += view_buffer.pending_views(id)
+        times = NaturalTimes(datetime.now())
+        version = ReadPublication.model_construct(
+            id=id,
+            creator_name=row.nickname,
+            **counters,
+            published_at=times.since(row.published_at),
+            last_update_at=times.since(row.last_update_at),
+            unique_viewers=await count_unique_viewers(id),
+        )
+        return publication_validators(version, row.last_update_at or row.published_at)
+
+    async def get_by_tag(
+        self,
+        tag: Tags,
+        cursor: str | None = None,
+        limit: int = 20,
+        filters: FeedFilters = FeedFilters(),
+    ):
+        publications, next_cursor = await self.paginate(
+            select(Publication).where(Publication.tag == tag),
+            cursor,
+            limit,
+            filters,
         )
-        publications = query.scalars().all()
-        if not publications:
+        if not publications and not cursor:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="No publication with that tag has been posted yet. Maybe you can be the first? :)",
             )
-        return publications
-
-    async def get_by_days(self, days: int, date_of_post: DateSearch):
+        return publications, next_cursor
+
+    async def get_by_days(
+        self,
+        days: int,
+        date_of_post: DateSearch,
+        cursor: str | None = None,
+        limit: int = 20,
+        filters: FeedFilters = FeedFilters(),
+    ):
         if date_of_post not in DateSearch:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="A error occurred. Try again with one of the pre-determined options.",
             )
-        if date_of_post == DateSearch.last:
-            query = await self.session.execute(
-                select(Publication).where(
-                    Publication.published_at >= datetime.now() - timedelta(days=days)
-                )
-            )
-
-        elif date_of_post == DateSearch.up:
-            query = await self.session.execute(
-                select(Publication).where(
-                    Publication.published_at <= datetime.now() - timedelta(days=days)
-                )
-            )
-
-        publications = query.scalars().all()
-        if not publications:
+        query = select(Publication).where(published_within(days, date_of_post))
+        publications, next_cursor = await self.paginate(query, cursor, limit, filters)
+        if not publications and not cursor:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="No publication found during that period of time.",
             )
-        return publications
-
-    async def like(self, post_id: int, current_user: User) -> ReadPublication:
-        publication = await self.get(post_id)
-        if not publication:
-            publication_id_not_found()
-
-        disliked_posts = await self.get_disliked_publications(current_user)
-        verification_disliked = 1
-        if disliked_posts and publication in disliked_posts:
-            verification_disliked = await self.dislike(
-                post_id, current_user
-            )  # will remove the dislike (existent link between the post and the user)
-
-        existent_link = await self.session.execute(
-            select(LikedPublicationAndUsers).where(
-                LikedPublicationAndUsers.publication_id == publication.id,
-                LikedPublicationAndUsers.user_id == current_user.id,
-            )
-        )
-        existent_link = existent_link.scalar_one_or_none()
-        if existent_link:
-            await self.session.delete(existent_link)
-            publication.likes -= 1
-            await self.session.commit()
-            publication_converted = await convert_publication_to_readable_publication(
-            publication, self.session
-        )
-            return {
-                "message": "You remove your like from this post.",
-                "publication": publication_converted,
-            }
-
-        new_link = LikedPublicationAndUsers(
-            publication_id=publication.id, user_id=current_user.id
-        )
-        self.session.add(new_link)
-        publication.likes += 1
-        await self.session.commit()
-        await self.session.refresh(new_link)
-        await self.session.refresh(publication)
-        publication_converted = await convert_publication_to_readable_publication(
-            publication, self.session
-        )
+        return publications, next_cursor
 
-        if verification_disliked != 1:
-            return {
-                "message": "Your dislike changed to a like! :)",
-                "publication": publication_converted,
-            }
-        return {"message": "You liked this post!", "publication": publication_converted}
+    async def like(self, post_id: int, current_user: Principal) -> ReadPublication:
+        return await self.react(post_id, current_user, Reaction.like)
 
-    async def get_liked_publications(self, current_user: User):
-        liked_posts = await self.session.execute(
-            select(LikedPublicationAndUsers).where(
-                LikedPublicationAndUsers.user_id == current_user.id
+    async def get_liked_publications(
+        self,
+        current_user: Principal,
+        cursor: str | None = None,
+        limit: int = 20,
+        filters: FeedFilters = FeedFilters(),
+    ):
+        liked_posts, next_cursor = await self.paginate(
+            select(Publication)
+            .join(
+                LikedPublicationAndUsers,
+                LikedPublicationAndUsers.publication_id == Publication.id,
             )
+            .where(LikedPublicationAndUsers.user_id == current_user.id),
+            cursor,
+            limit,
+            filters,
         )
-        if not liked_posts:
+        if not liked_posts and not cursor:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="You don't liked any publications yet.",
             )
-        liked_posts = liked_posts.scalars().all()
-        result = []
-        for post in liked_posts:
-            result.append(await self.session.get(Publication, post.publication_id))
-        return result
+        return liked_posts, next_cursor
+
+    async def dislike(self, post_id: int, current_user: Principal) -> ReadPublication:
+        return await self.react(post_id, current_user, Reaction.dislike)
 
-    async def dislike(self, post_id: int, current_user: User) -> ReadPublication:
+    async def react(self, post_id: int, current_user: Principal, reaction: Reaction):
         publication = await self.get(post_id)
         if not publication:
             publication_id_not_found()
-        liked_posts = await self.get_liked_publications(current_user)
-        verification_liked = 1
-
-        if liked_posts and publication in liked_posts:
-            verification_liked = await self.like(
-                post_id, current_user
-            )  # will remove the like (existent link between the post and the user)
-
-        existent_link = await self.session.execute(
-            select(DislikedPublicationAndUsers).where(
-                DislikedPublicationAndUsers.publication_id == publication.id,
-                DislikedPublicationAndUsers.user_id == current_user.id,
-            )
-        )
-        existent_link = existent_link.scalar_one_or_none()
-        if existent_link:
-            await self.session.delete(existent_link)
-            publication.dislikes -= 1
-            await self.session.commit()
-            publication_converted = await convert_publication_to_readable_publication(publication, self.session)
 
-            return {
-                "message": "You remove your dislike from this post.",
-                "publication": publication_converted,
-            }
-
-        new_link = DislikedPublicationAndUsers(
-            publication_id=publication.id, user_id=current_user.id
-        )
-        self.session.add(new_link)
-        publication.dislikes += 1
-        await self.session.commit()
-        await self.session.refresh(new_link)
-        publication_converted = await convert_publication_to_readable_publication(
-            publication, self.session
+        outcome = await toggle_reaction(
+            self.session, post_id, current_user.id, reaction
         )
 
-        if verification_liked != 1:
-            return {
-                "message": "Your like changed to a dislike! :(",
-                "publication": publication_converted,
-            }
         return {
-            "message": "You disliked this post!",
-            "publication": publication_converted,
+            "message": REACTION_MESSAGES[reaction][outcome],
+            "publication": await convert_publication_to_readable_publication(
+                publication, self.session
+            ),
         }
 
-    async def get_disliked_publications(self, current_user: User):
-        disliked_posts = await self.session.execute(
-            select(DislikedPublicationAndUsers).where(
-                DislikedPublicationAndUsers.user_id == current_user.id
+    async def get_disliked_publications(
+        self,
+        current_user: Principal,
+        cursor: str | None = None,
+        limit: int = 20,
+        filters: FeedFilters = FeedFilters(),
+    ):
+        disliked_posts, next_cursor = await self.paginate(
+            select(Publication)
+            .join(
+                DislikedPublicationAndUsers,
+                DislikedPublicationAndUsers.publication_id == Publication.id,
             )
+            .where(DislikedPublicationAndUsers.user_id == current_user.id),
+            cursor,
+            limit,
+            filters,
         )
-        if not disliked_posts:
+        if not disliked_posts and not cursor:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="You don't disliked any publications yet.",
             )
-        disliked_posts = disliked_posts.scalars().all()
-        result = []
-        for post in disliked_posts:
-            result.append(await self.session.get(Publication, post.publication_id))
-        return result
+        return disliked_posts, next_cursor
+
+    async def get_trending(
+        self,
+        tag: Tags | None = None,
+        cursor: str | None = None,
+        limit: int = 20,
+        filters: FeedFilters = FeedFilters(),
+    ):
+        """Page of the precomputed trending ranking, optionally for one tag.
+
+        The ranking lives in Redis sorted sets, so a page is a ZREVRANGE plus a
+        primary-key lookup of at most `limit` publications. The cursor is the
+        rank to resume from.
+        """
+        start = 0
+        if cursor:
+            start = decode_rank_cursor(cursor)
+            if start is None:
+                invalid_cursor()
+        try:
+            ids = await get_trending_ids(tag, start, limit + 1)
+        except RedisError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Trending publications are temporarily unavailable.",
+            )
+        next_cursor = None
+        if len(ids) > limit:
+            ids = ids[:limit]
+            next_cursor = encode_rank_cursor(start + limit)
+        if not ids:
+            return [], next_cursor
+
+        query = apply_feed_filters(
+            select(Publication).where(Publication.id.in_(ids)), filters
+        )
+        publications = {
+            publication.id: publication
+            for publication in await self.session.scalars(query)
+        }
+        return [publications[id] for id in ids if id in publications], next_cursor
+
+    async def search(
+        self,
+        text: str,
+        tag: Tags | None = None,
+        days: int | None = None,
+        date_of_post: DateSearch | None = None,
+        cursor: str | None = None,
+        limit: int = 20,
+        filters: FeedFilters = FeedFilters(),
+    ):
+        """Full-text search over title and description, best matches first.
+
+        Matches come from the GIN-indexed search_vector column and are ranked
+        with ts_rank_cd. Pages are keyset-paginated on (rank, id), so the cost of
+        a page does not grow with how deep it is.
+        """
+        search_query = func.websearch_to_tsquery(SEARCH_CONFIG, text)
+        search_vector = Publication.__table__.c.search_vector
+        rank = func.ts_rank_cd(search_vector, search_query)
+
+        query = select(Publication, rank).where(search_vector.op("@@")(search_query))
+        if tag:
+            query = query.where(Publication.tag == tag)
+        if days is not None and date_of_post is not None:
+            query = query.where(published_within(days, date_of_post))
+        query = apply_feed_filters(query, filters)
+        if cursor:
+            position = decode_search_cursor(cursor)
+            if position is None:
+                invalid_cursor()
+            query = query.where(tuple_(rank, Publication.id) < tuple_(*position))
+        query = query.order_by(desc(rank), desc(Publication.id)).limit(limit + 1)
+
+        rows = (await self.session.execute(query)).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_publication, last_rank = rows[-1]
+            next_cursor = encode_search_cursor(last_rank, last_publication.id)
+        return [publication for publication, _ in rows], next_cursor
+
+
+def publication_validators(
+    publication: ReadPublication, content_version: datetime
+) -> Validators:
+    # title and description are covered by content_version, everything else
+    # in the representation is hashed as displayed
+    return Validators(
+        etag=entity_tag(
+            content_version.isoformat(),
+            publication.id,
+            publication.creator_name,
+            publication.views,
+            publication.likes,
+            publication.dislikes,
+            publication.unique_viewers,
+            publication.published_at,
+            publication.last_update_at,
+        ),
+        last_modified=content_version,
+    )
 
 
-def publication_id_not_found():
+def apply_feed_filters(query, filters: FeedFilters):
+    """Hide the caller's blocked tags and creators inside the query itself.
+
+    Blocked creators are removed with an anti-join on the blocked_users primary
+    key, so the cost does not depend on how many users the caller blocks.
+    """
+    if filters.blocked_tags:
+        query = query.where(
+            or_(
+                Publication.tag.is_(None),
+                Publication.tag.not_in(filters.blocked_tags),
+            )
+        )
+    if filters.blocker_id:
+        query = query.where(
+            ~exists().where(
+                Blocked_Users.user_id == filters.blocker_id,
+                Blocked_Users.blocked_user_id == Publication.creator_id,
+            )
+        )
+    return query
+
+
+def published_within(days: int, date_of_post: DateSearch):
+    if date_of_post == DateSearch.last:
+        return Publication.published_at >= datetime.now() - timedelta(days=days)
+    return Publication.published_at <= datetime.now() - timedelta(days=days)
+
+
+def invalid_cursor():
     raise HTTPException(
-        status_code=status.HTTP_404_NOT_FOUND,
-        detail="No publication with that id has been found.",
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid cursor.",
     )
 
 
-async def convert_publication_to_readable_publication(
-    publication: Publication, session: AsyncSession
-) -> ReadPublication:
-    creator = await session.get(entity=User, ident=publication.creator_id)
-    publication = ReadPublication(
-        **publication.model_dump(exclude=["published_at", "creator", "last_update_at"]),
-        creator_name=creator.nickname,
-        published_at=humanize.naturaltime(datetime.now() - publication.published_at),
-        last_update_at=humanize.naturaltime(publication.last_update_at),
+def publication_id_not_found():
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="No publication with that id has been found.",
     )
-
-    return publication
@@ -0,0 +1,89 @@
+from enum import Enum
+from uuid import UUID
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import DislikedPublicationAndUsers, LikedPublicationAndUsers
+from app.services.counters import relay_counters, stage_counters
+
+
+class Reaction(str, Enum):
+    like = "like"
+    dislike = "dislike"
+
+
+class ReactionOutcome(str, Enum):
+    added = "added"
+    removed = "removed"
+    switched = "switched"
+
+
+# reaction -> (its link table, its counter, the opposite link table, its counter)
+_REACTION_TABLES = {
+    Reaction.like: (
+        LikedPublicationAndUsers,
+        "likes",
+        DislikedPublicationAndUsers,
+        "dislikes",
+    ),
+    Reaction.dislike: (
+        DislikedPublicationAndUsers,
+        "dislikes",
+        LikedPublicationAndUsers,
+        "likes",
+    ),
+}
+
+
+async def _delete_link(session: AsyncSession, link_model, publication_id, user_id):
+    result = await session.execute(
+        delete(link_model)
+        .where(
+            link_model.publication_id == publication_id,
+            link_model.user_id == user_id,
+        )
+        .returning(link_model.publication_id)
+    )
+    return len(result.all())
+
+
+async def toggle_reaction(
+    session: AsyncSession, publication_id: int, user_id: UUID, reaction: Reaction
+) -> ReactionOutcome:
+    """Toggle a reaction, switching away from the opposite one if needed.
+
+    Every link change is a single DELETE/INSERT ... RETURNING, and the counters
+    are only moved by the rows those statements actually touched. Clicks of
+    one user on one publication serialize on a transaction-scoped advisory
+    lock: without it, a like and a dislike sent together would each miss the
+    other's uncommitted INSERT and both succeed. The counter deltas go to the
+    write-behind buffer in `app.services.counters`, so the hot `publications`
+    row is not locked per click. They are staged as an outbox row in this same
+    transaction, so a crash after the commit cannot lose them.
+    """
+    link_model, counter, opposite_model, opposite_counter = _REACTION_TABLES[reaction]
+
+    await session.execute(
+        select(func.pg_advisory_xact_lock(publication_id, func.hashtext(str(user_id))))
+    )
+    removed = await _delete_link(session, link_model, publication_id, user_id)
+    if removed:
+        outcome = ReactionOutcome.removed
+        deltas = {counter: -removed}
+    else:
+        switched = await _delete_link(session, opposite_model, publication_id, user_id)
+        added = await session.execute(
+            insert(link_model)
+            .values(publication_id=publication_id, user_id=user_id)
+            .on_conflict_do_nothing()
+            .returning(link_model.publication_id)
+        )
+        outcome = ReactionOutcome.switched if switched else ReactionOutcome.added
+        deltas = {counter: len(added.all()), opposite_counter: -switched}
+
+    outbox = stage_counters(session, publication_id, deltas)
+    await session.commit()
+    if outbox is not None:
+        await relay_counters([outbox])
+    return outcome
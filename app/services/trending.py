@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import time
+from redis.exceptions import RedisError
+
+from app.database.config import DatabaseSettings as settings
+from app.database.models import Tags
+from app.database.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+TRENDING_ALL = "trending:all"
+_EPOCH_KEY = "trending:epoch"
+
+# Points per unit of each counter delta; a new publication starts with
+# PUBLISHED_POINTS so it can show up before anyone reacts to it.
+ACTIVITY_POINTS = {"likes": 3.0, "dislikes": -2.0, "views": 0.1}
+PUBLISHED_POINTS = 5.0
+
+# Scores use forward decay: an event is worth points * 2^((t - epoch) / half
+# life), so older activity loses weight relative to newer activity without
+# anyone rewriting it. Once the weights grow past 2^_RESCALE_AFTER the epoch
+# moves forward and the (capped) sets are scaled back down.
+_RESCALE_AFTER = 32
+_HALF_LIFE_SECONDS = settings().TRENDING_HALF_LIFE_HOURS * 3600
+_SIZE = settings().TRENDING_SIZE
+
+_INCREMENT_SCRIPT = """
+local now = tonumber(ARGV[1])
+local half_life = tonumber(ARGV[2])
+local epoch = tonumber(redis.call('GET', KEYS[1]))
+if not epoch then
+    epoch = now
+    redis.call('SET', KEYS[1], epoch)
+end
+local weight = 2 ^ ((now - epoch) / half_life)
+for i = 3, #ARGV, 3 do
+    redis.call('ZINCRBY', KEYS[tonumber(ARGV[i])], ARGV[i + 2] * weight, ARGV[i + 1])
+end
+"""
+
+_MAINTAIN_SCRIPT = """
+local now = tonumber(ARGV[1])
+local half_life = tonumber(ARGV[2])
+local size = tonumber(ARGV[3])
+local rescale_after = tonumber(ARGV[4])
+local epoch = tonumber(redis.call('GET', KEYS[1]))
+local rescale = epoch and (now - epoch) / half_life > rescale_after
+for i = 2, #KEYS do
+    redis.call('ZREMRANGEBYRANK', KEYS[i], 0, -(size + 1))
+    if rescale then
+        local factor = 2 ^ (-(now - epoch) / half_life)
+        redis.call('ZUNIONSTORE', KEYS[i], 1, KEYS[i], 'WEIGHTS', factor)
+    end
+end
+if rescale then
+    redis.call('SET', KEYS[1], now)
+end
+"""
+
+_increment = redis_client.register_script(_INCREMENT_SCRIPT)
+_maintain = redis_client.register_script(_MAINTAIN_SCRIPT)
+
+
+def trending_tag(tag: Tags) -> str:
+    return f"trending:tag:{tag.value}"
+
+
+def _trending_keys(tag: Tags | None) -> list[str]:
+    return [TRENDING_ALL, trending_tag(tag)] if tag else [TRENDING_ALL]
+
+
+async def _add_points(points: dict[tuple[int, Tags | None], float]):
+    keys = [_EPOCH_KEY]
+    args = [time.time(), _HALF_LIFE_SECONDS]
+    for (publication_id, tag), value in points.items():
+        if not value:
+            continue
+        for key in _trending_keys(tag):
+            if key not in keys:
+                keys.append(key)
+            args.extend((keys.index(key) + 1, publication_id, value))
+    if len(args) > 2:
+        await _increment(keys=keys, args=args)
+
+
+async def record_published(publication_id: int, tag: Tags | None):
+    try:
+        await _add_points({(publication_id, tag): PUBLISHED_POINTS})
+    except RedisError:
+        logger.warning("Redis unavailable, publication was not added to trending.")
+
+
+async def record_activity(
+    deltas: dict[int, dict[str, int]], tags: dict[int, Tags | None]
+):
+    """Add the points of a batch of flushed counter deltas in one round trip.
+
+    Only the publications in the batch are touched, so the cost follows the
+    activity since the last flush, never the size of `publications`.
+    """
+    points = {}
+    for publication_id, counters in deltas.items():
+        if publication_id not in tags:
+            continue
+        points[(publication_id, tags[publication_id])] = sum(
+            ACTIVITY_POINTS[counter] * delta for counter, delta in counters.items()
+        )
+    try:
+        await _add_points(points)
+    except RedisError:
+        logger.warning("Redis unavailable, trending scores were not updated.")
+
+
+async def forget_publication(publication_id: int, tag: Tags | None):
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key in _trending_keys(tag):
+                pipe.zrem(key, publication_id)
+            await pipe.execute()
+    except RedisError:
+        logger.warning("Redis unavailable, publication was not removed from trending.")
+
+
+async def get_trending_ids(tag: Tags | None, start: int, count: int) -> list[int]:
+    key = trending_tag(tag) if tag else TRENDING_ALL
+    return [
+        int(id) for id in await redis_client.zrevrange(key, start, start + count - 1)
+    ]
+
+
+async def maintain_trending():
+    """Trim every trending set to its top entries and rescale when due.
+
+    Works on at most TRENDING_SIZE members per set, whatever the table size.
+    """
+    await _maintain(
+        keys=[_EPOCH_KEY, TRENDING_ALL, *(trending_tag(tag) for tag in Tags)],
+        args=[time.time(), _HALF_LIFE_SECONDS, _SIZE, _RESCALE_AFTER],
+    )
+
+
+async def run_trending_maintenance(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await maintain_trending()
+        except Exception:
+            logger.exception("Failed to maintain the trending sets.")
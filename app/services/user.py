@@ -4,14 +4,12 @@ from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 from app.database.models import User
-from app.api.schemas.user import CreateUser, DeleteUser, UpdateUser
-
-from passlib.context import CryptContext
+from app.api.schemas.user import CreateUser, DeleteUser, Principal, UpdateUser
+from app.core.principals import principal_cache
+from app.core.security import password_hasher
 
 from app.utils import generate_access_token
 
-password_context = CryptContext(deprecated="auto", schemes="bcrypt")
-
 
 class UserService:
     def __init__(self, session: AsyncSession):
@@ -34,7 +32,7 @@ class UserService:
             **user_create.model_dump(exclude=["password"]),
             created_at=datetime.now(),
             id=uuid4(),
-            password_hashed=password_context.hash(user_create.password),
+            password_hashed=await password_hasher.hash(user_create.password),
         )
         self.session.add(new_user)
         await self.session.commit()
@@ -51,29 +49,39 @@ class UserService:
             )
         user_update = {
             **user_update.model_dump(exclude=["password"]),
-            "password_hashed": password_context.hash(user_update.password),
+            "password_hashed": await password_hasher.hash(user_update.password),
         }
         for key, value in user_update.items():
             setattr(user, key, value)
         self.session.add(user)
         await self.session.commit()
         await self.session.refresh(user)
+        principal_cache.forget(user.id)
         return await self.get(user.nickname)
 
-    async def delete(self, delete_user: DeleteUser, current_user: User):
+    async def delete(self, delete_user: DeleteUser, current_user: Principal):
         if not current_user or not delete_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="A error occurred. Verify if you are authenticated and provided a valid json.",
             )
-        if password_context.verify(
-            delete_user.password, current_user.password_hashed
+        # The principal may come from a cache that outlived the user (deleted
+        # or renamed through another worker), so the row can be gone.
+        user = await self.session.get(User, current_user.id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No user found with the id provided.",
+            )
+        if await password_hasher.verify(
+            delete_user.password, user.password_hashed
         ) and (
             delete_user.model_dump(exclude=["password"])
-            == current_user.model_dump(exclude=["password_hashed", "created_at"])
+            == current_user.model_dump(exclude=["created_at"])
         ):
-            await self.session.delete(await self.get(current_user.nickname))
+            await self.session.delete(user)
             await self.session.commit()
+            principal_cache.forget(current_user.id)
             return {"detail": f"The user {current_user.nickname} has been deleted."}
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -82,7 +90,7 @@ class UserService:
 
     async def token(self, nickname, password):
         user = await self.get(nickname)
-        if not user or not password_context.verify(password, user.password_hashed):
+        if not user or not await password_hasher.verify(password, user.password_hashed):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="The data provided is invalid.",
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from redis.exceptions import RedisError
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.database.config import DatabaseSettings as settings
+from app.database.redis import redis_client
+from app.services.counters import commit_counters
+
+logger = logging.getLogger(__name__)
+
+
+def viewers_key(publication_id: int) -> str:
+    return f"publication_viewers:{publication_id}"
+
+
+class ViewBuffer:
+    """In-process buffer of publication views.
+
+    Recording a view only touches local memory. Views are drained in batches,
+    either every flush interval or as soon as `batch_size` views are waiting,
+    through the counter outbox (which the counter flusher applies to Postgres)
+    and into one HyperLogLog of unique viewers per publication. A batch the
+    outbox could not take goes back into the buffer for the next flush.
+    """
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+        self._views: Counter[int] = Counter()
+        self._viewers: defaultdict[int, set[str]] = defaultdict(set)
+        self._size = 0
+        self._flush_task: asyncio.Task | None = None
+
+    def record(self, publication_id: int, viewer: str | None = None):
+        self._views[publication_id] += 1
+        if viewer:
+            self._viewers[publication_id].add(viewer)
+        self._size += 1
+        if self._size >= self.batch_size and (
+            self._flush_task is None or self._flush_task.done()
+        ):
+            self._flush_task = asyncio.create_task(self.flush())
+
+    def pending_views(self, publication_id: int) -> int:
+        return self._views.get(publication_id, 0)
+
+    async def flush(self) -> int:
+        if not self._size:
+            return 0
+        views, viewers = self._views, self._viewers
+        self._views, self._viewers, self._size = Counter(), defaultdict(set), 0
+
+        try:
+            await commit_counters({id: {"views": count} for id, count in views.items()})
+        except (SQLAlchemyError, OSError):
+            logger.warning("Postgres unavailable, views are kept for the next flush.")
+            self._views.update(views)
+            self._size += sum(views.values())
+            views = Counter()
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for id, publication_viewers in viewers.items():
+                    pipe.pfadd(viewers_key(id), *publication_viewers)
+                await pipe.execute()
+        except RedisError:
+            logger.warning("Redis unavailable, unique viewers were not recorded.")
+        return sum(views.values())
+
+
+async def count_unique_viewers(publication_id: int) -> int | None:
+    try:
+        return await redis_client.pfcount(viewers_key(publication_id))
+    except RedisError:
+        return None
+
+
+async def run_view_flusher(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await view_buffer.flush()
+        except Exception:
+            logger.exception("Failed to flush publication views.")
+
+
+view_buffer = ViewBuffer(settings().VIEW_BATCH_SIZE)
@@ -1,15 +1,30 @@
-from datetime import datetime, timedelta
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from time import time
 
 from app.database.config import SecuritySettings as settings
 from uuid import uuid4
 import jwt
 
+# read once: the settings re-read the .env file every time they are built
+_JWT_SECRET = settings().JWT_SECRET
+_JWT_ALGORITHM = settings().JWT_ALGORITHM
+_TOKEN_LIFETIME = settings().ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
 
 def generate_access_token(data: dict):
+    # sub-second iat, so a "revoke all tokens issued before" cutoff does not
+    # also catch a token issued later in the same second
+    issued_at = time()
     token = jwt.encode(
-        payload={**data, "jti": str(uuid4), "exp": datetime.now() + timedelta(days=1)},
-        key=settings().JWT_SECRET,
-        algorithm=settings().JWT_ALGORITHM,
+        payload={
+            **data,
+            "jti": str(uuid4()),
+            "iat": issued_at,
+            "exp": int(issued_at + _TOKEN_LIFETIME),
+        },
+        key=_JWT_SECRET,
+        algorithm=_JWT_ALGORITHM,
     )
 
     return token
@@ -17,8 +32,49 @@ def generate_access_token(data: dict):
 
 def decode_access_token(token: str):
     try:
-        return jwt.decode(
-            jwt=token, key=settings().JWT_SECRET, algorithms=[settings().JWT_ALGORITHM]
-        )
+        return jwt.decode(jwt=token, key=_JWT_SECRET, algorithms=[_JWT_ALGORITHM])
     except jwt.PyJWTError:
         return None
+
+
+def encode_cursor(published_at: datetime, id: int) -> str:
+    raw = f"{published_at.isoformat()}|{id}".encode()
+    return urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int] | None:
+    try:
+        published_at, id = _decode_cursor_fields(cursor)
+        return datetime.fromisoformat(published_at), int(id)
+    except ValueError:
+        return None
+
+
+def encode_search_cursor(rank: float, id: int) -> str:
+    raw = f"{rank!r}|{id}".encode()
+    return urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, int] | None:
+    try:
+        rank, id = _decode_cursor_fields(cursor)
+        return float(rank), int(id)
+    except ValueError:
+        return None
+
+
+def encode_rank_cursor(rank: int) -> str:
+    return urlsafe_b64encode(str(rank).encode()).decode().rstrip("=")
+
+
+def decode_rank_cursor(cursor: str) -> int | None:
+    try:
+        (rank,) = _decode_cursor_fields(cursor)
+        rank = int(rank)
+    except ValueError:
+        return None
+    return rank if rank >= 0 else None
+
+
+def _decode_cursor_fields(cursor: str) -> list[str]:
+    return urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split("|")
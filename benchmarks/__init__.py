@@ -0,0 +1,19 @@
+"""In-process load-testing benchmarks for the MiniBlog API.
+
+Run with `python -m benchmarks --help`.
+"""
+
+import sys
+
+
+def refuse_unless_scratch_database(force: bool):
+    """Exit unless POSTGRES_DB names a benchmark database (or `force`)."""
+    # imported here: the runners adjust settings in the environment first
+    from app.database.config import DatabaseSettings
+
+    database = DatabaseSettings().POSTGRES_DB
+    if "bench" not in database and not force:
+        sys.exit(
+            f"Refusing to wipe database {database!r}; point POSTGRES_DB at a "
+            "benchmark database or pass --force."
+        )
@@ -0,0 +1,262 @@
+"""Seed a scratch database and measure every scenario through the ASGI app.
+
+The app is driven in-process by an httpx ASGI transport, with its lifespan
+running, against the Postgres and Redis configured in the environment. Those
+should be local stand-ins: the run truncates every table and flushes Redis,
+so it refuses databases whose name does not contain "bench" unless --force.
+
+    python -m benchmarks --scale small --output before.json
+    python -m benchmarks.compare before.json after.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks import refuse_unless_scratch_database
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "--scale", choices=["small", "medium", "large"], default="small"
+    )
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--requests", type=int, default=500, help="per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        default=[],
+        help="only run scenarios whose name contains this (repeatable)",
+    )
+    parser.add_argument(
+        "--output", help="write the JSON results here (default: stdout)"
+    )
+    parser.add_argument(
+        "--keep-limits",
+        action="store_true",
+        help="keep the configured rate limits and load shedding thresholds",
+    )
+    parser.add_argument("--force", action="store_true")
+    return parser.parse_args(argv)
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    index = min(
+        len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1)
+    )
+    return sorted_values[index]
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_scenario(client, scenario, context, args, statements) -> dict:
+    rng = random.Random(f"{args.seed}:{scenario.name}")
+    total = max(1, int(args.requests * scenario.weight))
+    concurrency = min(args.concurrency, total)
+
+    for _ in range(min(10, total)):
+        response = await scenario.request(client, context, rng)
+        if response.status_code in scenario.expected and scenario.check:
+            # a benchmark of an empty result measures nothing
+            assert scenario.check(response), f"{scenario.name} returned no data"
+
+    latencies: list[float] = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await scenario.request(client, context, rng)
+            await response.aread()
+            latencies.append(time.perf_counter() - started)
+            if response.status_code not in scenario.expected or (
+                scenario.check and not scenario.check(response)
+            ):
+                errors += 1
+
+    statements_before = statements["count"]
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "router": scenario.router,
+        "requests": total,
+        "concurrency": concurrency,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "throughput_rps": total / elapsed,
+        "queries_per_request": (statements["count"] - statements_before) / total,
+        "error_rate": errors / total,
+    }
+
+
+async def run_mix(client, mix, context, args, statements) -> dict:
+    """Run `mix.measured` as usual while `mix.background` hammers the app.
+
+    Each background scenario gets `--concurrency` workers of its own, which
+    loop until the measured scenario is done. queries_per_request counts the
+    statements of both, over every request sent during the run.
+    """
+    stopped = asyncio.Event()
+    background = {
+        scenario.name: {"latencies": [], "errors": 0} for scenario in mix.background
+    }
+
+    async def background_worker(scenario, rng):
+        stats = background[scenario.name]
+        while not stopped.is_set():
+            started = time.perf_counter()
+            response = await scenario.request(client, context, rng)
+            await response.aread()
+            stats["latencies"].append(time.perf_counter() - started)
+            if response.status_code not in scenario.expected:
+                stats["errors"] += 1
+
+    workers = [
+        asyncio.create_task(
+            background_worker(
+                scenario, random.Random(f"{args.seed}:{mix.name}:{scenario.name}:{n}")
+            )
+        )
+        for scenario in mix.background
+        for n in range(args.concurrency)
+    ]
+    statements_before = statements["count"]
+    try:
+        result = await run_scenario(client, mix.measured, context, args, statements)
+    finally:
+        stopped.set()
+        await asyncio.gather(*workers)
+
+    background_requests = 0
+    result["background"] = {}
+    for name, stats in background.items():
+        latencies = sorted(stats["latencies"])
+        background_requests += len(latencies)
+        result["background"][name] = {
+            "requests": len(latencies),
+            "p95_ms": percentile(latencies, 0.95) * 1000 if latencies else None,
+            "error_rate": stats["errors"] / len(latencies) if latencies else None,
+        }
+    result["measured"] = mix.measured.name
+    result["queries_per_request"] = (statements["count"] - statements_before) / (
+        result["requests"] + background_requests
+    )
+    return result
+
+
+async def run(args) -> dict:
+    import httpx
+    from sqlalchemy import event
+
+    from app.database.redis import flush_scratch_database
+    from app.database.session import async_session, engine
+    from app.main import app
+    from benchmarks.data import SCALES, reset, seed
+    from benchmarks.scenarios import MIXES, SCENARIOS, Context
+
+    scale = SCALES[args.scale]
+    try:
+        await flush_scratch_database("benchmarks")
+    except RuntimeError as error:
+        sys.exit(str(error))
+    async with async_session() as session:
+        await reset(session)
+        seeding_started = time.perf_counter()
+        dataset = await seed(session, scale, args.seed)
+        seeding_seconds = time.perf_counter() - seeding_started
+    context = Context.build(dataset)
+
+    statements = {"count": 0}
+
+    def count_statement(*_):
+        statements["count"] += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+
+    def selected(name: str) -> bool:
+        return not args.scenario or any(pattern in name for pattern in args.scenario)
+
+    scenarios = [scenario for scenario in SCENARIOS if selected(scenario.name)]
+    mixes = [mix for mix in MIXES if selected(mix.name)]
+    results = {}
+    transport = httpx.ASGITransport(app=app, client=("127.0.0.1", 50000))
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark", timeout=None
+        ) as client:
+            for scenario in scenarios:
+                print(f"running {scenario.name}", file=sys.stderr)
+                results[scenario.name] = await run_scenario(
+                    client, scenario, context, args, statements
+                )
+            for mix in mixes:
+                print(f"running {mix.name}", file=sys.stderr)
+                results[mix.name] = await run_mix(
+                    client, mix, context, args, statements
+                )
+
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "scale": args.scale,
+        "scale_detail": scale.__dict__,
+        "seed": args.seed,
+        "seeding_seconds": seeding_seconds,
+        "scenarios": results,
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    refuse_unless_scratch_database(args.force)
+    if not args.keep_limits:
+        # settings are read at import, so this has to happen before app loads
+        os.environ["RATE_LIMITS"] = json.dumps(
+            dict.fromkeys(["auth", "reaction", "search", "import"], "1000000/second")
+        )
+        os.environ["MAX_CONCURRENT_REQUESTS"] = str(10**9)
+        os.environ["MAX_EVENT_LOOP_LAG_SECONDS"] = "1000000"
+
+    # the internal scenarios need the endpoints enabled
+    os.environ.setdefault("INTERNAL_API_TOKEN", "benchmark")
+
+    from alembic import command
+    from alembic.config import Config
+    from app.database.session import ALEMBIC_CONFIG
+
+    command.upgrade(Config(ALEMBIC_CONFIG), "head")
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
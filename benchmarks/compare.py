@@ -0,0 +1,56 @@
+"""Compare two benchmark reports scenario by scenario.
+
+    python -m benchmarks.compare before.json after.json --fail-over 10
+
+Exits with status 1 when any scenario's p95 latency grew by more than
+--fail-over percent, so it can gate a CI job.
+"""
+
+import argparse
+import json
+import sys
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "queries_per_request")
+
+
+def change(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--fail-over", type=float, default=None, metavar="PERCENT")
+    args = parser.parse_args(argv)
+
+    with open(args.before) as file:
+        before = json.load(file)["scenarios"]
+    with open(args.after) as file:
+        after = json.load(file)["scenarios"]
+
+    regressions = []
+    print(f"{'scenario':40}" + "".join(f"{metric:>30}" for metric in METRICS))
+    for name in sorted(before.keys() & after.keys()):
+        cells = []
+        for metric in METRICS:
+            old, new = before[name][metric], after[name][metric]
+            cells.append(f"{old:.2f} -> {new:.2f} ({change(old, new)})")
+        print(f"{name:40}" + "".join(f"{cell:>30}" for cell in cells))
+        old_p95, new_p95 = before[name]["p95_ms"], after[name]["p95_ms"]
+        if (
+            args.fail_over is not None
+            and old_p95
+            and (new_p95 - old_p95) / old_p95 * 100 > args.fail_over
+        ):
+            regressions.append(name)
+
+    if regressions:
+        print(f"p95 regressed by more than {args.fail_over}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import random
+import orjson
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from uuid import UUID
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import password_context
+from app.database.models import (
+    Blocked_Tags,
+    DislikedPublicationAndUsers,
+    LikedPublicationAndUsers,
+    Publication,
+    Tags,
+    User,
+)
+from app.services.counters import COUNTERS
+from app.services.trending import maintain_trending, record_activity
+
+BENCHMARK_PASSWORD = "benchmark-password"
+_INSERT_CHUNK_SIZE = 5000
+
+# Small vocabulary so search terms hit a realistic share of the corpus.
+VOCABULARY = (
+    "python fastapi postgres redis cache index query async latency review "
+    "guitar album concert movie series painting museum football marathon "
+    "budget savings market crypto recipe garden travel weekend election "
+    "science planet climate health running sleep coffee keyboard linux game"
+).split()
+
+
+@dataclass(frozen=True)
+class Scale:
+    users: int
+    publications: int
+    reactions_per_user: int
+    blocked_tags_per_user: int
+
+
+SCALES = {
+    "small": Scale(
+        users=200, publications=5_000, reactions_per_user=20, blocked_tags_per_user=1
+    ),
+    "medium": Scale(
+        users=2_000,
+        publications=100_000,
+        reactions_per_user=50,
+        blocked_tags_per_user=2,
+    ),
+    "large": Scale(
+        users=20_000,
+        publications=1_000_000,
+        reactions_per_user=100,
+        blocked_tags_per_user=3,
+    ),
+}
+
+
+@dataclass
+class Dataset:
+    """What the scenarios need to know about the seeded rows."""
+
+    user_ids: list[UUID] = field(default_factory=list)
+    nicknames: list[str] = field(default_factory=list)
+    publications: list[tuple[int, datetime]] = field(default_factory=list)
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+async def _insert(session: AsyncSession, model, rows: list[dict]):
+    for start in range(0, len(rows), _INSERT_CHUNK_SIZE):
+        await session.execute(insert(model), rows[start : start + _INSERT_CHUNK_SIZE])
+
+
+async def reset(session: AsyncSession):
+    await session.execute(
+        text(
+            'TRUNCATE "user", publications, likedpublicationandusers, '
+            "dislikedpublicationandusers, blocked_tags, blocked_users, "
+            "counter_flushes, counter_deltas RESTART IDENTITY CASCADE"
+        )
+    )
+    await session.commit()
+
+
+async def seed(session: AsyncSession, scale: Scale, seed: int) -> Dataset:
+    """Insert a synthetic dataset; the same seed always yields the same rows.
+
+    Every user's password is BENCHMARK_PASSWORD. The publication counters
+    match the inserted reactions.
+    """
+    rng = random.Random(seed)
+    now = datetime.now()
+    dataset = Dataset()
+    password_hashed = password_context.hash(BENCHMARK_PASSWORD)
+    tags = list(Tags)
+
+    users = []
+    for index in range(scale.users):
+        user_id = UUID(int=rng.getrandbits(128), version=4)
+        nickname = f"user{index}"
+        users.append(
+            {
+                "id": user_id,
+                "name": f"User {index}",
+                "nickname": nickname,
+                "password_hashed": password_hashed,
+                "created_at": now - timedelta(days=rng.randint(1, 1000)),
+            }
+        )
+        dataset.user_ids.append(user_id)
+        dataset.nicknames.append(nickname)
+
+    publications = []
+    for id in range(1, scale.publications + 1):
+        published_at = now - timedelta(seconds=rng.randint(0, 365 * 86400))
+        publications.append(
+            {
+                "id": id,
+                "creator_id": rng.choice(dataset.user_ids),
+                "tag": rng.choice(tags),
+                "title": _sentence(rng, rng.randint(2, 8)).capitalize(),
+                "description": _sentence(rng, rng.randint(10, 120)),
+                "views": rng.randint(0, 5000),
+                "likes": 0,
+                "dislikes": 0,
+                "published_at": published_at,
+                "last_update_at": None,
+            }
+        )
+        dataset.publications.append((id, published_at))
+
+    likes, dislikes, blocked_tags = [], [], []
+    for user_id in dataset.user_ids:
+        reacted = rng.sample(
+            range(scale.publications),
+            min(scale.reactions_per_user, scale.publications),
+        )
+        for index in reacted:
+            publication = publications[index]
+            link = {"publication_id": publication["id"], "user_id": user_id}
+            if rng.random() < 0.8:
+                likes.append(link)
+                publication["likes"] += 1
+            else:
+                dislikes.append(link)
+                publication["dislikes"] += 1
+        for tag in rng.sample(tags, scale.blocked_tags_per_user):
+            blocked_tags.append({"user_id": user_id, "tag": tag})
+
+    await _insert(session, User, users)
+    await _insert(session, Publication, publications)
+    await _insert(session, LikedPublicationAndUsers, likes)
+    await _insert(session, DislikedPublicationAndUsers, dislikes)
+    await _insert(session, Blocked_Tags, blocked_tags)
+    await session.execute(
+        text(
+            "SELECT setval(pg_get_serial_sequence('publications', 'id'), "
+            "(SELECT coalesce(max(id), 1) FROM publications))"
+        )
+    )
+    await session.commit()
+    await session.execute(text("ANALYZE"))
+    await _seed_trending(publications)
+    return dataset
+
+
+async def _seed_trending(publications: list[dict]):
+    """Score the seeded counters as if the counter flusher had just applied them."""
+    for start in range(0, len(publications), _INSERT_CHUNK_SIZE):
+        chunk = publications[start : start + _INSERT_CHUNK_SIZE]
+        await record_activity(
+            {
+                publication["id"]: {
+                    counter: publication[counter] for counter in COUNTERS
+                }
+                for publication in chunk
+            },
+            {publication["id"]: publication["tag"] for publication in chunk},
+        )
+        # trimmed as it goes, so the sets never hold the whole corpus
+        await maintain_trending()
+
+
+def import_body(rng: random.Random, rows: int) -> bytes:
+    """NDJSON body for the bulk import scenario."""
+    return b"".join(
+        orjson.dumps(
+            {
+                "title": _sentence(rng, 4),
+                "description": _sentence(rng, 30),
+                "tag": rng.choice(list(Tags)).value,
+            }
+        )
+        + b"\n"
+        for _ in range(rows)
+    )
@@ -0,0 +1,239 @@
+import random
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+import httpx
+
+from app.database.config import SecuritySettings
+from app.database.models import Tags
+from app.utils import encode_cursor, generate_access_token
+from benchmarks.data import BENCHMARK_PASSWORD, VOCABULARY, Dataset, import_body
+
+
+@dataclass
+class Context:
+    dataset: Dataset
+    # pre-issued tokens, so only the login scenario pays for bcrypt
+    tokens: list[dict[str, str]] = field(default_factory=list)
+    internal: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, dataset: Dataset, authenticated_users: int = 100) -> "Context":
+        context = cls(dataset)
+        internal_token = SecuritySettings().INTERNAL_API_TOKEN
+        if internal_token:
+            context.internal = {"X-Internal-Token": internal_token}
+        for user_id, nickname in list(zip(dataset.user_ids, dataset.nicknames))[
+            :authenticated_users
+        ]:
+            token = generate_access_token(
+                {"user": {"username": nickname, "id": str(user_id)}}
+            )
+            context.tokens.append({"Authorization": f"Bearer {token}"})
+        return context
+
+    def auth(self, rng: random.Random) -> dict[str, str]:
+        return rng.choice(self.tokens)
+
+    def publication_id(self, rng: random.Random) -> int:
+        return rng.choice(self.dataset.publications)[0]
+
+    def deep_cursor(self, rng: random.Random) -> str:
+        id, published_at = rng.choice(self.dataset.publications)
+        return encode_cursor(published_at, id)
+
+
+Request = Callable[
+    [httpx.AsyncClient, Context, random.Random], Awaitable[httpx.Response]
+]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    router: str
+    request: Request
+    # statuses that count as a successful request
+    expected: frozenset[int] = frozenset({200})
+    # heavy or mutating scenarios run fewer requests
+    weight: float = 1.0
+    # whether a successful response has the content the scenario is about
+    check: Callable[[httpx.Response], bool] | None = None
+
+
+@dataclass(frozen=True)
+class Mix:
+    """Scenarios run at the same time, reporting `measured` only.
+
+    `background` keeps sending requests for as long as `measured` runs, so
+    its latencies are the ones users see while the app is under that load.
+    """
+
+    name: str
+    measured: Scenario
+    background: tuple[Scenario, ...]
+
+
+SCENARIOS: list[Scenario] = []
+MIXES: list[Mix] = []
+
+
+def scenario(
+    router: str,
+    expected=frozenset({200}),
+    weight: float = 1.0,
+    check: Callable[[httpx.Response], bool] | None = None,
+):
+    def register(request: Request) -> Request:
+        name = f"{router}.{request.__name__}"
+        SCENARIOS.append(
+            Scenario(name, router, request, frozenset(expected), weight, check)
+        )
+        return request
+
+    return register
+
+
+def mix(name: str, measured: Request, *background: Request):
+    by_request = {scenario.request: scenario for scenario in SCENARIOS}
+    MIXES.append(
+        Mix(
+            f"mixed.{name}",
+            by_request[measured],
+            tuple(by_request[request] for request in background),
+        )
+    )
+
+
+# users
+
+
+@scenario("users")
+async def me(client, context, rng):
+    return await client.get("/users/", headers=context.auth(rng))
+
+
+@scenario("users", weight=0.2)
+async def login_storm(client, context, rng):
+    return await client.post(
+        "/users/login",
+        data={
+            "username": rng.choice(context.dataset.nicknames),
+            "password": BENCHMARK_PASSWORD,
+        },
+    )
+
+
+# publications
+
+
+@scenario("publications")
+async def latest(client, context, rng):
+    return await client.get("/publications/latest")
+
+
+@scenario("publications")
+async def latest_authenticated(client, context, rng):
+    return await client.get("/publications/latest", headers=context.auth(rng))
+
+
+@scenario("publications")
+async def latest_deep_page(client, context, rng):
+    return await client.get(
+        "/publications/latest", params={"cursor": context.deep_cursor(rng)}
+    )
+
+
+@scenario("publications")
+async def by_tag(client, context, rng):
+    return await client.get(
+        "/publications/tag", params={"tag": rng.choice(list(Tags)).value}
+    )
+
+
+@scenario("publications")
+async def by_days(client, context, rng):
+    return await client.get(
+        "/publications/days",
+        params={"days": rng.randint(1, 60), "date_of_post": "last"},
+    )
+
+
+@scenario("publications", expected={200, 404})
+async def by_id(client, context, rng):
+    return await client.get(
+        "/publications/id", params={"id": context.publication_id(rng)}
+    )
+
+
+@scenario("publications")
+async def search(client, context, rng):
+    words = " ".join(rng.sample(VOCABULARY, rng.randint(1, 2)))
+    return await client.get("/publications/search", params={"q": words})
+
+
+def has_items(response: httpx.Response) -> bool:
+    return bool(response.json()["items"])
+
+
+@scenario("publications", check=has_items)
+async def trending(client, context, rng):
+    return await client.get("/publications/trending")
+
+
+@scenario("publications", expected={200, 404})
+async def mine(client, context, rng):
+    return await client.get("/publications/me", headers=context.auth(rng))
+
+
+@scenario("publications", expected={200, 404})
+async def liked_posts(client, context, rng):
+    return await client.get("/publications/liked-posts", headers=context.auth(rng))
+
+
+@scenario("publications", expected={200, 404})
+async def like_toggle(client, context, rng):
+    return await client.get(
+        "/publications/like-post",
+        params={"id": context.publication_id(rng)},
+        headers=context.auth(rng),
+    )
+
+
+@scenario("publications", weight=0.1)
+async def export_ndjson(client, context, rng):
+    return await client.get("/publications/me/export", headers=context.auth(rng))
+
+
+@scenario("publications", weight=0.02)
+async def bulk_import(client, context, rng):
+    return await client.post(
+        "/publications/import",
+        content=import_body(rng, 1000),
+        headers={**context.auth(rng), "Content-Type": "application/x-ndjson"},
+    )
+
+
+# blocks
+
+
+@scenario("blocks", weight=0.2)
+async def block_tag_toggle(client, context, rng):
+    return await client.post(
+        "/block/tags",
+        params={"tag": rng.choice(list(Tags)).value},
+        headers=context.auth(rng),
+    )
+
+
+# internal
+
+
+@scenario("internal")
+async def cache_stats(client, context, rng):
+    return await client.get("/internal/cache", headers=context.internal)
+
+
+# mixed
+
+# bcrypt runs on the hashing pool, so logins should not slow the feed down
+mix("latest_during_login_storm", latest, login_storm)
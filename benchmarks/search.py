@@ -0,0 +1,172 @@
+"""Search latency as the corpus grows, full-text search against an ILIKE scan.
+
+Seeds each scale in turn and times the same queries two ways: through
+PublicationService.search (websearch_to_tsquery on the GIN-indexed
+search_vector, ranked) and through the ILIKE filter a search without the
+index needs, newest first. Two kinds of query are timed:
+
+* common: one or two words of the seeding vocabulary, which most
+  publications contain, as the HTTP search scenario sends them;
+* rare: a word planted in exactly NEEDLE_MATCHES publications whatever the
+  scale, the case the index is for. Its full-text time should stay nearly
+  flat while the ILIKE scan grows with the table.
+
+Like `python -m benchmarks`, it wipes the database, so POSTGRES_DB has to
+name a benchmark database unless --force.
+
+    python -m benchmarks.search --scales small medium --queries 100
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from sqlalchemy import and_, desc, or_, select, text
+
+from app.database.models import Publication
+from app.database.redis import flush_scratch_database
+from app.database.session import ALEMBIC_CONFIG, async_session, engine
+from app.services.publications import PublicationService
+from benchmarks import refuse_unless_scratch_database
+from benchmarks.data import SCALES, VOCABULARY, reset, seed
+
+NEEDLES = ("zephyr", "quokka", "fjord")
+NEEDLE_MATCHES = 50
+PAGE_SIZE = 20
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.search")
+    parser.add_argument(
+        "--scales",
+        nargs="+",
+        choices=["small", "medium", "large"],
+        default=["small", "medium"],
+    )
+    parser.add_argument("--queries", type=int, default=100, help="per query kind")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--force", action="store_true")
+    return parser.parse_args(argv)
+
+
+def ilike_search(words: list[str]):
+    """What search costs without the index: every word, anywhere, newest first."""
+    return (
+        select(Publication)
+        .where(
+            and_(
+                *(
+                    or_(
+                        Publication.title.ilike(f"%{word}%"),
+                        Publication.description.ilike(f"%{word}%"),
+                    )
+                    for word in words
+                )
+            )
+        )
+        .order_by(desc(Publication.published_at), desc(Publication.id))
+        .limit(PAGE_SIZE + 1)
+    )
+
+
+async def plant_needles(session, publication_ids: list[int], rng: random.Random):
+    for needle in NEEDLES:
+        await session.execute(
+            text(
+                "UPDATE publications SET title = title || ' ' || :needle "
+                "WHERE id = ANY(:ids)"
+            ),
+            {"needle": needle, "ids": rng.sample(publication_ids, NEEDLE_MATCHES)},
+        )
+    await session.commit()
+    await session.execute(text("ANALYZE publications"))
+
+
+async def measure(session, queries: list[list[str]]) -> dict:
+    service = PublicationService(session)
+    timings = {"fulltext": [], "ilike": []}
+    for words in queries:
+        started = time.perf_counter()
+        await service.search(" ".join(words), limit=PAGE_SIZE)
+        timings["fulltext"].append(time.perf_counter() - started)
+        session.expunge_all()
+
+        started = time.perf_counter()
+        (await session.execute(ilike_search(words))).scalars().all()
+        timings["ilike"].append(time.perf_counter() - started)
+        session.expunge_all()
+    return {
+        method: {
+            "median_ms": statistics.median(values) * 1000,
+            "p95_ms": statistics.quantiles(values, n=20)[-1] * 1000,
+        }
+        for method, values in timings.items()
+    }
+
+
+async def run(args) -> dict:
+    results = {}
+    for name in args.scales:
+        scale = SCALES[name]
+        rng = random.Random(f"{args.seed}:{name}")
+        print(f"seeding {name}", file=sys.stderr)
+        # seeding scores the trending sets in Redis
+        try:
+            await flush_scratch_database("benchmarks")
+        except RuntimeError as error:
+            sys.exit(str(error))
+        async with async_session() as session:
+            await reset(session)
+            dataset = await seed(session, scale, args.seed)
+            await plant_needles(session, [id for id, _ in dataset.publications], rng)
+            queries = {
+                "common": [
+                    rng.sample(VOCABULARY, rng.randint(1, 2))
+                    for _ in range(args.queries)
+                ],
+                "rare": [[rng.choice(NEEDLES)] for _ in range(args.queries)],
+            }
+            print(f"measuring {name}", file=sys.stderr)
+            results[name] = {
+                "publications": scale.publications,
+                **{
+                    kind: await measure(session, kind_queries)
+                    for kind, kind_queries in queries.items()
+                },
+            }
+    await engine.dispose()
+
+    smallest, largest = args.scales[0], args.scales[-1]
+    growth = {
+        "publications": results[largest]["publications"]
+        / results[smallest]["publications"],
+        **{
+            f"{kind}.{method}": results[largest][kind][method]["median_ms"]
+            / results[smallest][kind][method]["median_ms"]
+            for kind in ("common", "rare")
+            for method in ("fulltext", "ilike")
+        },
+    }
+    return {
+        "seed": args.seed,
+        "scales": results,
+        f"growth_{smallest}_to_{largest}": growth,
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    refuse_unless_scratch_database(args.force)
+
+    from alembic import command
+    from alembic.config import Config
+
+    command.upgrade(Config(ALEMBIC_CONFIG), "head")
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
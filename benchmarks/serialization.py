@@ -0,0 +1,129 @@
+"""Microbenchmark of the publication page serializers, no database needed.
+
+Compares the model path (a ReadPublication per row, then response_model
+validation and JSON encoding as FastAPI does it) with encode_publication_page
+on the same in-memory rows. Creator names and pending counters are inputs of
+both, so only serialization is measured.
+
+    python -m benchmarks.serialization --rows 10000 --repeat 5
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.api.schemas.publication import PublicationPage
+from app.database.models import Publication, Tags, User
+from app.services.conversion import (
+    build_readable_publication,
+    encode_publication_page,
+)
+from benchmarks.data import VOCABULARY
+
+
+def build_rows(rows: int, seed: int) -> list[Publication]:
+    rng = random.Random(seed)
+    now = datetime.now()
+    creators = [
+        User(
+            id=uuid4(),
+            name=f"User {index}",
+            nickname=f"user{index}",
+            password_hashed="",
+            created_at=now,
+        )
+        for index in range(100)
+    ]
+    publications = []
+    for id in range(1, rows + 1):
+        creator = rng.choice(creators)
+        publication = Publication(
+            id=id,
+            creator_id=creator.id,
+            tag=rng.choice(list(Tags)),
+            title=" ".join(rng.choices(VOCABULARY, k=5)),
+            description=" ".join(rng.choices(VOCABULARY, k=60)),
+            views=rng.randint(0, 5000),
+            likes=rng.randint(0, 500),
+            dislikes=rng.randint(0, 50),
+            published_at=now - timedelta(seconds=rng.randint(0, 365 * 86400)),
+            last_update_at=None,
+        )
+        publication.creator = creator
+        publications.append(publication)
+    return publications
+
+
+def model_path(publications, creator_names, now) -> bytes:
+    page = PublicationPage(
+        items=[
+            build_readable_publication(
+                publication, creator_names[publication.creator_id], now, {}
+            )
+            for publication in publications
+        ],
+        next_cursor=None,
+    )
+    validated = TypeAdapter(PublicationPage).validate_python(page)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def orjson_path(publications, creator_names, now) -> bytes:
+    return encode_publication_page(publications, creator_names, {}, None, now)
+
+
+def measure(path, publications, repeat: int) -> list[float]:
+    creator_names = {
+        publication.creator_id: publication.creator.nickname
+        for publication in publications
+    }
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        path(publications, creator_names, datetime.now())
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def run(rows: int, repeat: int, seed: int) -> dict:
+    publications = build_rows(rows, seed)
+    creator_names = {
+        publication.creator_id: publication.creator.nickname
+        for publication in publications
+    }
+    now = datetime.now()
+    assert json.loads(model_path(publications, creator_names, now)) == json.loads(
+        orjson_path(publications, creator_names, now)
+    ), "the two paths must render the same document"
+    results = {}
+    for name, path in (("model_path", model_path), ("orjson_path", orjson_path)):
+        timings = measure(path, publications, repeat)
+        results[name] = {
+            "median_ms": statistics.median(timings) * 1000,
+            "min_ms": min(timings) * 1000,
+        }
+    results["speedup"] = (
+        results["model_path"]["median_ms"] / results["orjson_path"]["median_ms"]
+    )
+    return {"rows": rows, "repeat": repeat, "results": results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.serialization")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.rows, args.repeat, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Schema as created by create_all before migrations were introduced.
+
+Databases created that way are brought under migrations with
+`alembic stamp 0001_baseline` followed by `alembic upgrade head`.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+TAGS = sa.Enum(
+    "others",
+    "games",
+    "health",
+    "technology",
+    "programming",
+    "finances",
+    "cience",
+    "arts",
+    "Sports",
+    "news",
+    "enternainment",
+    "culture",
+    "politics",
+    "at_home",
+    "free_time",
+    name="tags",
+)
+
+
+def upgrade():
+    op.create_table(
+        "user",
+        sa.Column("id", postgresql.UUID(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("nickname", sa.String(), nullable=False),
+        sa.Column("password_hashed", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_user_id", "user", ["id"])
+    op.create_index("ix_user_nickname", "user", ["nickname"], unique=True)
+
+    op.create_table(
+        "blocked_tags",
+        sa.Column("user_id", postgresql.UUID(), nullable=False),
+        sa.Column("tag", TAGS, nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("user_id", "tag"),
+    )
+
+    op.create_table(
+        "publications",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("creator_id", postgresql.UUID(), nullable=False),
+        sa.Column("tag", TAGS, nullable=True),
+        sa.Column("title", sa.String(length=100), nullable=False),
+        sa.Column("description", sa.String(length=2000), nullable=False),
+        sa.Column("views", sa.Integer(), nullable=False),
+        sa.Column("likes", sa.Integer(), nullable=False),
+        sa.Column("dislikes", sa.Integer(), nullable=False),
+        sa.Column("published_at", sa.DateTime(), nullable=False),
+        sa.Column("last_update_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["creator_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    for table in ("likedpublicationandusers", "dislikedpublicationandusers"):
+        op.create_table(
+            table,
+            sa.Column("publication_id", sa.Integer(), nullable=False),
+            sa.Column("user_id", postgresql.UUID(), nullable=False),
+            sa.ForeignKeyConstraint(["publication_id"], ["publications.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+            sa.PrimaryKeyConstraint("publication_id", "user_id"),
+        )
+
+
+def downgrade():
+    op.drop_table("dislikedpublicationandusers")
+    op.drop_table("likedpublicationandusers")
+    op.drop_table("publications")
+    op.drop_table("blocked_tags")
+    op.drop_index("ix_user_nickname", table_name="user")
+    op.drop_index("ix_user_id", table_name="user")
+    op.drop_table("user")
+    TAGS.drop(op.get_bind())
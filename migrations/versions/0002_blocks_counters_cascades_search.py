@@ -0,0 +1,126 @@
+"""Blocked users, counter flush log, cascading foreign keys and search vector.
+
+search_vector is a plain nullable column kept up to date by a trigger, not a
+generated column: adding a stored generated column rewrites the whole table
+under an ACCESS EXCLUSIVE lock, blocking reads and writes for as long as that
+takes. Adding a nullable column only touches the catalog. Existing rows are
+then filled in committed batches, each locking only the rows it updates, and
+0003 builds the GIN index concurrently.
+
+Revision ID: 0002_blocks_counters_cascades_search
+Revises: 0001_baseline
+Create Date: 2026-10-18
+"""
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0002_blocks_counters_cascades_search"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+# (table, column, referenced table) of every foreign key that now cascades.
+CASCADING_FOREIGN_KEYS = (
+    ("blocked_tags", "user_id", '"user"'),
+    ("publications", "creator_id", '"user"'),
+    ("likedpublicationandusers", "publication_id", "publications"),
+    ("likedpublicationandusers", "user_id", '"user"'),
+    ("dislikedpublicationandusers", "publication_id", "publications"),
+    ("dislikedpublicationandusers", "user_id", '"user"'),
+)
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', {row}title), 'A') || "
+    "setweight(to_tsvector('simple', {row}description), 'B')"
+)
+SEARCH_VECTOR_TRIGGER = "publications_search_vector_update"
+BACKFILL_BATCH_SIZE = 5000
+
+
+def _replace_foreign_keys(on_delete: str):
+    # Added NOT VALID and validated after the migration transaction commits, so
+    # existing rows are checked under a lock that does not block writes.
+    for table, column, referenced in CASCADING_FOREIGN_KEYS:
+        name = f"{table}_{column}_fkey"
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT {name}")
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {name} FOREIGN KEY ({column}) "
+            f"REFERENCES {referenced} (id) {on_delete} NOT VALID"
+        )
+
+
+def _validate_foreign_keys():
+    with op.get_context().autocommit_block():
+        for table, column, _ in CASCADING_FOREIGN_KEYS:
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_{column}_fkey")
+
+
+def _create_search_vector():
+    op.add_column(
+        "publications",
+        sa.Column("search_vector", postgresql.TSVECTOR(), nullable=True),
+    )
+    op.execute(f"""
+        CREATE FUNCTION {SEARCH_VECTOR_TRIGGER}() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {SEARCH_VECTOR.format(row="NEW.")};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """)
+    op.execute(
+        f"CREATE TRIGGER {SEARCH_VECTOR_TRIGGER} "
+        "BEFORE INSERT OR UPDATE OF title, description ON publications "
+        f"FOR EACH ROW EXECUTE FUNCTION {SEARCH_VECTOR_TRIGGER}()"
+    )
+
+
+def _backfill_search_vector():
+    # Runs after the trigger is committed, so rows written meanwhile already
+    # have their vector and every batch shrinks what is left.
+    update = f"UPDATE publications SET search_vector = {SEARCH_VECTOR.format(row='')} "
+    with op.get_context().autocommit_block():
+        if context.is_offline_mode():
+            # a script cannot loop; it fills every row in one statement
+            op.execute(update + "WHERE search_vector IS NULL")
+            return
+        batch = update + (
+            "WHERE id IN (SELECT id FROM publications WHERE search_vector IS NULL "
+            f"LIMIT {BACKFILL_BATCH_SIZE})"
+        )
+        connection = op.get_bind()
+        while connection.execute(sa.text(batch)).rowcount:
+            pass
+
+
+def upgrade():
+    op.create_table(
+        "blocked_users",
+        sa.Column("user_id", postgresql.UUID(), nullable=False),
+        sa.Column("blocked_user_id", postgresql.UUID(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["blocked_user_id"], ["user.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "blocked_user_id"),
+    )
+    op.create_table(
+        "counter_flushes",
+        sa.Column("batch_id", sa.String(), nullable=False),
+        sa.Column("flushed_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("batch_id"),
+    )
+    _replace_foreign_keys("ON DELETE CASCADE")
+    _create_search_vector()
+    _validate_foreign_keys()
+    _backfill_search_vector()
+
+
+def downgrade():
+    op.execute(f"DROP TRIGGER {SEARCH_VECTOR_TRIGGER} ON publications")
+    op.execute(f"DROP FUNCTION {SEARCH_VECTOR_TRIGGER}()")
+    op.drop_column("publications", "search_vector")
+    _replace_foreign_keys("")
+    _validate_foreign_keys()
+    op.drop_table("counter_flushes")
+    op.drop_table("blocked_users")
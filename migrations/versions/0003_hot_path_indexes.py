@@ -0,0 +1,69 @@
+"""Indexes for the listing, search, reaction and cascade-delete paths.
+
+Built with CREATE INDEX CONCURRENTLY outside the migration transaction, so
+writes to the tables are not blocked while they build. A build interrupted
+halfway leaves an invalid index behind: drop it and run the upgrade again.
+
+Revision ID: 0003_hot_path_indexes
+Revises: 0002_blocks_counters_cascades_search
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+revision = "0003_hot_path_indexes"
+down_revision = "0002_blocks_counters_cascades_search"
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, access method)
+INDEXES = (
+    ("ix_publications_published_at_id", "publications", ["published_at", "id"], None),
+    (
+        "ix_publications_tag_published_at_id",
+        "publications",
+        ["tag", "published_at", "id"],
+        None,
+    ),
+    (
+        "ix_publications_creator_id_published_at_id",
+        "publications",
+        ["creator_id", "published_at", "id"],
+        None,
+    ),
+    ("ix_publications_search_vector", "publications", ["search_vector"], "gin"),
+    (
+        "ix_likedpublicationandusers_user_id",
+        "likedpublicationandusers",
+        ["user_id"],
+        None,
+    ),
+    (
+        "ix_dislikedpublicationandusers_user_id",
+        "dislikedpublicationandusers",
+        ["user_id"],
+        None,
+    ),
+    ("ix_blocked_users_blocked_user_id", "blocked_users", ["blocked_user_id"], None),
+)
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, using in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_using=using,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table, postgresql_concurrently=True, if_exists=True
+            )
@@ -0,0 +1,107 @@
+"""Integration tests, run against the Postgres and Redis of the environment.
+
+Every test starts from empty tables and an empty Redis database, so the
+suite only runs when POSTGRES_DB names a test database (it contains "test"),
+and it is skipped when Postgres or Redis cannot be reached. Redis is only
+flushed when REDIS_DB is empty or was flushed by the suite before.
+
+    POSTGRES_DB=miniblog_test REDIS_DB=15 python -m pytest
+"""
+
+from datetime import datetime, timedelta
+from uuid import uuid4
+import pytest
+from alembic import command
+from alembic.config import Config
+from redis.exceptions import RedisError
+from sqlalchemy import event, insert, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import SQLModel
+
+from app.database.config import DatabaseSettings
+from app.database.models import Publication, Tags, User
+from app.database.redis import flush_scratch_database, redis_client
+from app.database.session import ALEMBIC_CONFIG, async_session, engine
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def migrated_database():
+    database = DatabaseSettings().POSTGRES_DB
+    if "test" not in database:
+        pytest.skip(f"POSTGRES_DB={database!r} is not a test database.")
+    try:
+        command.upgrade(Config(ALEMBIC_CONFIG), "head")
+    except (OSError, SQLAlchemyError) as error:
+        pytest.skip(f"Postgres is unavailable: {error}")
+
+
+@pytest.fixture
+async def session(migrated_database):
+    tables = ", ".join(f'"{table.name}"' for table in SQLModel.metadata.sorted_tables)
+    async with engine.begin() as connection:
+        await connection.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+    try:
+        await flush_scratch_database("tests")
+    except RedisError as error:
+        pytest.skip(f"Redis is unavailable: {error}")
+    except RuntimeError as error:
+        pytest.skip(str(error))
+    async with async_session() as session:
+        yield session
+    # every test runs on its own event loop, pooled connections cannot follow
+    await engine.dispose()
+    await redis_client.connection_pool.disconnect()
+
+
+@pytest.fixture
+def statements():
+    """SQL statements sent to Postgres while the test runs."""
+    executed = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+async def add_users(session, count: int) -> list[User]:
+    users = [
+        User(
+            id=uuid4(),
+            name=f"User {index}",
+            nickname=f"user{index}",
+            password_hashed="not-a-hash",
+            created_at=datetime.now(),
+        )
+        for index in range(count)
+    ]
+    session.add_all(users)
+    await session.commit()
+    return users
+
+
+async def add_publications(session, users: list[User], count: int) -> list[int]:
+    now = datetime.now()
+    result = await session.execute(
+        insert(Publication).returning(Publication.id),
+        [
+            {
+                "creator_id": users[index % len(users)].id,
+                "tag": Tags.games,
+                "title": f"Publication {index}",
+                "description": "description",
+                "published_at": now - timedelta(minutes=index),
+            }
+            for index in range(count)
+        ],
+    )
+    ids = list(result.scalars())
+    await session.commit()
+    return ids
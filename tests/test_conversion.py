@@ -0,0 +1,31 @@
+import orjson
+import pytest
+
+from app.services.conversion import render_publication_page
+from app.services.publications import PublicationService
+from tests.conftest import add_publications, add_users
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_page_conversion_runs_the_same_queries_for_any_page_size(
+    session, statements
+):
+    users = await add_users(session, 10)
+    await add_publications(session, users, 60)
+    service = PublicationService(session)
+
+    async def statements_for_page(limit: int) -> int:
+        session.expunge_all()
+        statements.clear()
+        publications, next_cursor = await service.get_latest_publications(limit=limit)
+        page = orjson.loads(
+            await render_publication_page(publications, session, next_cursor)
+        )
+        assert len(page["items"]) == limit
+        assert {item["creator_name"] for item in page["items"]} <= {
+            user.nickname for user in users
+        }
+        return len(statements)
+
+    assert await statements_for_page(5) == await statements_for_page(50)
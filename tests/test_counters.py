@@ -0,0 +1,90 @@
+import pytest
+from redis.exceptions import RedisError
+from sqlalchemy import func, select
+
+from app.database.models import CounterDelta, Publication
+from app.services import counters
+from app.services.counters import (
+    flush_counters,
+    get_pending_counters,
+    relay_counters,
+    stage_counters,
+)
+from tests.conftest import add_publications, add_users
+
+pytestmark = pytest.mark.anyio
+
+
+async def _flushed_likes(session, publication_id: int) -> int:
+    await flush_counters()
+    publication = await session.get(Publication, publication_id)
+    await session.refresh(publication)
+    return publication.likes
+
+
+def _raise(error):
+    async def fail(*args, **kwargs):
+        raise error
+
+    return fail
+
+
+async def test_a_relayed_outbox_row_is_counted_once(session):
+    users = await add_users(session, 1)
+    [publication_id] = await add_publications(session, users, 1)
+    outbox = stage_counters(session, publication_id, {"likes": 1})
+    await session.commit()
+
+    await relay_counters([outbox])
+    # as if the first reply was lost and the relay retried
+    await relay_counters([outbox])
+
+    assert await get_pending_counters([publication_id]) == {
+        (publication_id, "likes"): 1
+    }
+    assert await _flushed_likes(session, publication_id) == 1
+    assert await session.scalar(select(func.count()).select_from(CounterDelta)) == 0
+
+
+async def test_an_outbox_row_never_relayed_is_counted_by_the_flush(session):
+    users = await add_users(session, 1)
+    [publication_id] = await add_publications(session, users, 1)
+    stage_counters(session, publication_id, {"likes": 1})
+    await session.commit()
+
+    assert await _flushed_likes(session, publication_id) == 1
+
+
+async def test_rolled_back_deltas_are_never_counted(session):
+    users = await add_users(session, 1)
+    [publication_id] = await add_publications(session, users, 1)
+    stage_counters(session, publication_id, {"likes": 1})
+    await session.rollback()
+
+    assert await _flushed_likes(session, publication_id) == 0
+
+
+async def test_a_committed_batch_left_in_redis_is_not_counted_again(
+    session, monkeypatch
+):
+    users = await add_users(session, 1)
+    [publication_id] = await add_publications(session, users, 1)
+    for likes in (1, 2):
+        outbox = stage_counters(session, publication_id, {"likes": likes})
+        await session.commit()
+        await relay_counters([outbox])
+        if likes == 1:
+            with monkeypatch.context() as patch:
+                patch.setattr(
+                    counters.redis_client, "delete", _raise(RedisError("down"))
+                )
+                assert await _flushed_likes(session, publication_id) == 1
+            # as seen from another worker, which has to look the batch up
+            monkeypatch.setattr(counters, "_last_applied_batch", None)
+            assert await get_pending_counters([publication_id]) == {}
+
+    assert await get_pending_counters([publication_id]) == {
+        (publication_id, "likes"): 2
+    }
+    assert await _flushed_likes(session, publication_id) == 3
+    assert await get_pending_counters([publication_id]) == {}
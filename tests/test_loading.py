@@ -0,0 +1,69 @@
+import orjson
+import pytest
+from sqlalchemy.exc import InvalidRequestError
+from sqlmodel import select
+
+from app.database.loading import PublicationLoad
+from app.database.models import (
+    DislikedPublicationAndUsers,
+    LikedPublicationAndUsers,
+    Publication,
+)
+from app.services.conversion import (
+    convert_publications_to_readable_publications,
+    render_publication_page,
+)
+from app.services.publications import PublicationService
+from tests.conftest import add_publications, add_users
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("load", list(PublicationLoad))
+async def test_every_loading_profile_renders_with_a_fixed_number_of_queries(
+    session, statements, load
+):
+    users = await add_users(session, 10)
+    ids = await add_publications(session, users, 60)
+    for index, publication_id in enumerate(ids):
+        session.add(
+            LikedPublicationAndUsers(publication_id=publication_id, user_id=users[0].id)
+        )
+        session.add(
+            DislikedPublicationAndUsers(
+                publication_id=publication_id, user_id=users[1 + index % 9].id
+            )
+        )
+    await session.commit()
+    service = PublicationService(session)
+
+    async def statements_for_page(limit: int) -> int:
+        session.expunge_all()
+        statements.clear()
+        publications, next_cursor = await service.paginate(
+            select(Publication), None, limit, load=load
+        )
+        # A relationship the profile did not load raises InvalidRequestError
+        # (lazy="raise"), failing the test, instead of querying once per row.
+        page = orjson.loads(
+            await render_publication_page(publications, session, next_cursor)
+        )
+        readable = await convert_publications_to_readable_publications(
+            publications, session
+        )
+        assert len(page["items"]) == len(readable) == limit
+        if load == PublicationLoad.full:
+            for publication in publications:
+                assert publication.creator.nickname
+                assert [user.id for user in publication.users_that_liked] == [
+                    users[0].id
+                ]
+                assert len(publication.users_that_disliked) == 1
+        elif load == PublicationLoad.with_creator:
+            assert all(publication.creator.nickname for publication in publications)
+        else:
+            with pytest.raises(InvalidRequestError):
+                publications[0].creator
+        return len(statements)
+
+    assert await statements_for_page(5) == await statements_for_page(50)
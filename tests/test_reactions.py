@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from sqlalchemy import func, select
+
+from app.database.models import (
+    DislikedPublicationAndUsers,
+    LikedPublicationAndUsers,
+    Publication,
+)
+from app.database.session import async_session
+from app.services.counters import flush_counters
+from app.services.reactions import Reaction, ReactionOutcome, toggle_reaction
+from tests.conftest import add_publications, add_users
+
+pytestmark = pytest.mark.anyio
+
+
+async def _count(session, link_model, condition) -> int:
+    return await session.scalar(
+        select(func.count()).select_from(link_model).where(condition)
+    )
+
+
+async def test_toggle_adds_removes_and_switches(session):
+    [user] = await add_users(session, 1)
+    [publication_id] = await add_publications(session, [user], 1)
+
+    outcomes = [
+        await toggle_reaction(session, publication_id, user.id, reaction)
+        for reaction in (
+            Reaction.like,
+            Reaction.like,
+            Reaction.dislike,
+            Reaction.like,
+        )
+    ]
+
+    assert outcomes == [
+        ReactionOutcome.added,
+        ReactionOutcome.removed,
+        ReactionOutcome.added,
+        ReactionOutcome.switched,
+    ]
+
+
+async def test_concurrent_clicks_keep_one_reaction_and_exact_counters(session):
+    users = await add_users(session, 3)
+    [publication_id] = await add_publications(session, users, 1)
+
+    async def click(user, reaction: Reaction):
+        async with async_session() as own_session:
+            await toggle_reaction(own_session, publication_id, user.id, reaction)
+
+    for _ in range(5):
+        await asyncio.gather(
+            *(
+                click(user, reaction)
+                for user in users
+                for reaction in (Reaction.like, Reaction.dislike) * 2
+            )
+        )
+
+    for user in users:
+        reactions = await _count(
+            session,
+            LikedPublicationAndUsers,
+            LikedPublicationAndUsers.user_id == user.id,
+        ) + await _count(
+            session,
+            DislikedPublicationAndUsers,
+            DislikedPublicationAndUsers.user_id == user.id,
+        )
+        assert reactions <= 1
+    likes = await _count(
+        session,
+        LikedPublicationAndUsers,
+        LikedPublicationAndUsers.publication_id == publication_id,
+    )
+    dislikes = await _count(
+        session,
+        DislikedPublicationAndUsers,
+        DislikedPublicationAndUsers.publication_id == publication_id,
+    )
+
+    await flush_counters()
+    publication = await session.get(Publication, publication_id)
+    await session.refresh(publication)
+    assert (publication.likes, publication.dislikes) == (likes, dislikes)
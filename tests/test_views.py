@@ -0,0 +1,61 @@
+import pytest
+from redis.exceptions import RedisError
+from sqlalchemy.exc import OperationalError
+
+from app.database.models import Publication
+from app.services import counters
+from app.services.counters import flush_counters
+from app.services.views import ViewBuffer
+from tests.conftest import add_publications, add_users
+
+pytestmark = pytest.mark.anyio
+
+
+async def _flushed_views(session, publication_id: int) -> int:
+    await flush_counters()
+    publication = await session.get(Publication, publication_id)
+    await session.refresh(publication)
+    return publication.views
+
+
+async def test_views_relayed_with_a_lost_reply_are_counted_once(session, monkeypatch):
+    users = await add_users(session, 1)
+    [publication_id] = await add_publications(session, users, 1)
+    relay_rows = counters._relay_rows
+
+    async def relay_then_lose_the_reply(rows):
+        await relay_rows(rows)
+        raise RedisError("connection lost")
+
+    monkeypatch.setattr(counters, "_relay_rows", relay_then_lose_the_reply)
+    buffer = ViewBuffer(batch_size=100)
+    for _ in range(3):
+        buffer.record(publication_id)
+    await buffer.flush()
+    monkeypatch.setattr(counters, "_relay_rows", relay_rows)
+
+    assert buffer.pending_views(publication_id) == 0
+    assert await _flushed_views(session, publication_id) == 3
+
+
+async def test_views_that_could_not_be_committed_are_kept_for_the_next_flush(
+    session, monkeypatch
+):
+    users = await add_users(session, 1)
+    [publication_id] = await add_publications(session, users, 1)
+
+    async def fail(deltas):
+        raise OperationalError("INSERT", {}, ConnectionError())
+
+    buffer = ViewBuffer(batch_size=100)
+    for _ in range(3):
+        buffer.record(publication_id)
+    with monkeypatch.context() as patch:
+        patch.setattr("app.services.views.commit_counters", fail)
+        assert await buffer.flush() == 0
+    assert buffer.pending_views(publication_id) == 3
+
+    buffer.record(publication_id)
+    assert await buffer.flush() == 4
+    assert buffer.pending_views(publication_id) == 0
+    assert await _flushed_views(session, publication_id) == 4